@@ -1,7 +1,15 @@
 """
 Model various nuclear reactions under different sets of assumptions.
 """
-import pandas as pd
+import functools
 
-pd.set_option('display.max_columns', 500)
-pd.set_option('display.width', 1000)
+
+@functools.lru_cache(maxsize=None)
+def load_pandas():
+    """Import and configure pandas on first use.  It takes up most of the
+    startup time and is only needed for decay scenarios.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    pd.set_option('display.max_columns', 500)
+    pd.set_option('display.width', 1000)
+    return pd
@@ -0,0 +1,192 @@
+"""Caches for precomputed combinations: a bounded in-process LRU, in front of
+a single-file, size-capped store backed by sqlite3 in WAL mode so that
+concurrent readers and writers are safe.
+"""
+# pylint: disable=too-few-public-methods
+from collections import OrderedDict
+import logging
+import os
+import sqlite3
+import time
+
+
+CACHE_DIR = os.path.expanduser('~/.reactions')
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, 'combinations.sqlite3')
+DEFAULT_MAX_BYTES = 2 ** 30
+DEFAULT_MEMORY_BYTES = 2 ** 28
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS combinations (
+    mass_number INTEGER NOT NULL,
+    atomic_number INTEGER NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (mass_number, atomic_number)
+);
+CREATE INDEX IF NOT EXISTS combinations_accessed ON combinations (accessed);
+"""
+
+
+class MemoryCache:
+    """An in-process LRU of immutable values keyed by totals.  Values report
+    their size through an `nbytes` attribute, and the least recently used
+    values are dropped once the total goes over `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        self.nbytes = 0
+        self._values = OrderedDict()
+
+    def __repr__(self):
+        return '{}(hits={}, misses={}, nbytes={})'.format(
+            self.__class__.__name__, self.hits, self.misses, self.nbytes)
+
+    def get(self, totals):
+        """Return the value held for the totals, or None if there is none."""
+        value = self._values.get(totals)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._values.move_to_end(totals)
+        return value
+
+    def put(self, totals, value):
+        """Hold on to the value, unless it is larger than the whole budget."""
+        if totals in self._values:
+            self.nbytes -= self._values.pop(totals).nbytes
+        if value.nbytes > self.max_bytes:
+            return
+        self._values[totals] = value
+        self.nbytes += value.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._values.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, totals):
+        return totals in self._values
+
+    def clear(self):
+        """Drop all of the values and reset the counters."""
+        self._values.clear()
+        self.hits = self.misses = self.nbytes = 0
+
+
+class CombinationStore:
+    """Cached values keyed by the (mass number, atomic number) totals of a
+    reaction.  Each write happens in its own transaction, so a crash cannot
+    leave a partial entry behind, and the least recently used entries are
+    evicted once the total size of the values goes over `max_bytes`.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._pid = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.path)
+
+    @property
+    def connection(self):
+        """A connection to the database, reopened after a fork, since sqlite3
+        connections cannot be shared between processes.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(_SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get(self, totals):
+        """Return the value stored for the totals, or None if there is none."""
+        try:
+            connection = self.connection
+            row = connection.execute(
+                'SELECT value FROM combinations'
+                ' WHERE mass_number = ? AND atomic_number = ?',
+                totals,
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                'UPDATE combinations SET accessed = ?'
+                ' WHERE mass_number = ? AND atomic_number = ?',
+                (time.time(), *totals),
+            )
+        except sqlite3.Error as error:
+            logging.warning('unable to read from %s: %s', self.path, error)
+            return None
+        return row[0]
+
+    def put(self, totals, value):
+        """Store the value for the totals and evict the least recently used
+        entries until the store fits within its budget again.
+        """
+        try:
+            connection = self.connection
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute(
+                    'INSERT OR REPLACE INTO combinations VALUES (?, ?, ?, ?, ?)',
+                    (*totals, sqlite3.Binary(value), len(value), time.time()),
+                )
+                self._evict(connection, totals)
+        except sqlite3.Error as error:
+            logging.warning('unable to write to %s: %s', self.path, error)
+
+    def _evict(self, connection, totals):
+        total, = connection.execute('SELECT TOTAL(size) FROM combinations').fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = connection.execute(
+            'SELECT mass_number, atomic_number, size FROM combinations'
+            ' ORDER BY accessed',
+        )
+        evicted = []
+        for mass_number, atomic_number, size in rows:
+            if total <= self.max_bytes:
+                break
+            if (mass_number, atomic_number) == tuple(totals):
+                continue
+            evicted.append((mass_number, atomic_number))
+            total -= size
+        connection.executemany(
+            'DELETE FROM combinations WHERE mass_number = ? AND atomic_number = ?',
+            evicted,
+        )
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM combinations').fetchone()[0]
+
+    def __contains__(self, totals):
+        row = self.connection.execute(
+            'SELECT 1 FROM combinations WHERE mass_number = ? AND atomic_number = ?',
+            totals,
+        ).fetchone()
+        return row is not None
+
+    @property
+    def size(self):
+        """The total size in bytes of the stored values."""
+        return int(self.connection.execute(
+            'SELECT TOTAL(size) FROM combinations'
+        ).fetchone()[0])
+
+    def close(self):
+        """Close the connection, if one is open in this process."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = self._pid = None
@@ -3,11 +3,12 @@ Calculate various quantities of interest for an input reaction or decay.
 """
 # pylint: disable=no-self-use, invalid-name, too-many-instance-attributes
 # pylint: disable=too-few-public-methods
+from collections import OrderedDict
+from copy import copy as shallow_copy
 import math
 import numpy as np
-import pandas as pd
-import scipy.constants as cs
 
+from . import load_pandas
 from .constants import FINE_STRUCTURE_CONSTANT_MEV_FM, HBAR_MEV_S
 from .units import Energy, Power, Distance
 from .views import DecayTerminalView
@@ -33,6 +34,40 @@ from .views import DecayTerminalView
 #
 #   1.57 fm
 #   https://goo.gl/nNFgSA
+#
+# The `r0` option selects one of these, or several at once, in which case
+# the calculations are broadcast over them.
+DEFAULT_R0 = 1.2
+
+
+def nuclear_radius_constant(kwargs):
+    """The r0 in fm given in a set of options, which is either a number or
+    a sequence of numbers.
+    """
+    r0 = kwargs.get('r0')
+    if r0 is None:
+        return DEFAULT_R0
+    return tuple(float(r) for r in r0) if np.ndim(r0) else float(r0)
+
+
+def single_radius_constant(kwargs):
+    """The r0 in fm given in a set of options, for a calculation that gives
+    one value per reaction and so cannot take several values of r0.
+    """
+    r0 = nuclear_radius_constant(kwargs)
+    if np.ndim(r0):
+        raise ValueError('several values of r0 can only be swept: {}'.format(r0))
+    return r0
+
+
+def _frozen(value):
+    # A hashable form of an option, which may be an array.
+    return tuple(np.ravel(value).tolist()) if np.ndim(value) else value
+
+
+def r0_column(column, r0):
+    """The name of a column computed for one of several values of r0."""
+    return '{}_r0_{:g}'.format(column, r0)
 
 
 class Calculation:
@@ -128,7 +163,12 @@ class GamowSuppressionFactor(Calculation):
     - from Hermes's comments
     """
     def value(self):
-        """Compute the Gamow factor."""
+        """Compute the Gamow factor.  If several values of r0 are given, an
+        array with the factor for each of them is returned.
+        """
+        r0 = nuclear_radius_constant(self.kwargs)
+        if np.ndim(r0):
+            return self._kernel().sweep([self.kwargs.get('screening') or 0], r0)[0, 0]
         screening = self.kwargs.get('screening') or 0
         A = self.larger.mass_number
         Z = self.larger.atomic_number - screening
@@ -139,13 +179,185 @@ class GamowSuppressionFactor(Calculation):
             return math.nan
         # Distances in fm
         # Changed from 1.1 to 1.2, and from .333333 to 1/3
-        rs = 1.2 * (pow(A, 1/3) + pow(A4, 1/3))
+        rs = r0 * (pow(A, 1/3) + pow(A4, 1/3))
         rc = float(Z) * Z4 * 1.43998 / Q
         r = 1 if rc <= 0 else rs / rc
         G = 0 if r >= 1 else math.acos(math.sqrt(r)) - math.sqrt(r * (1. - r))
         m = (float(A) * A4) / (A + A4)
         return 0.2708122 * Z * Z4 * G * math.sqrt(m / Q)
 
+    def sweep(self, screenings, r0s=None):
+        """The value for each of an array of screening values, computed in
+        one pass, and for each of an array of values of r0, if given.
+        """
+        return self._kernel().sweep(screenings, r0s)[0]
+
+    def _kernel(self):
+        kwargs = {k: v for k, v in self.kwargs.items() if k != 'r0'}
+        r0 = nuclear_radius_constant(self.kwargs)
+        return GamowKernel.load([(self.parent, (self.smaller, self.larger))], [self.q_value],
+                                r0=DEFAULT_R0 if np.ndim(r0) else r0, **kwargs)
+
+
+class GamowKernel:
+    """Compute `GamowSuppressionFactor`, `Gamow2` and `GeigerNuttal` for many
+    two-body reactions at once, over NumPy arrays of the (A, Z) numbers of
+    the smaller and larger daughters, the Q-values in MeV and the screening,
+    which can also be a single number, as can the nuclear radius constant
+    r0.  The arithmetic follows the scalar
+    calculations step by step, and agrees with them to within rounding.
+    Rows with a Q-value that is not positive come out as NaN, as with
+    `GamowSuppressionFactor`; where the scalar `Gamow2` and `GeigerNuttal`
+    raise a math domain error, the kernel gives NaN as well.
+    """
+
+    @classmethod
+    def load(cls, components, q_values, **kwargs):
+        """Factory method taking the (parent, (smaller, larger)) components of
+        a set of reactions and their Q-values, as with `Calculation.load`.
+        None of the components may be None.
+        """
+        smaller = [(s.mass_number, s.atomic_number, s.mass.mev) for _, (s, _) in components]
+        larger = [(l.mass_number, l.atomic_number) for _, (_, l) in components]
+        smaller = np.array(smaller, dtype=float).reshape(-1, 3)
+        larger = np.array(larger, dtype=float).reshape(-1, 2)
+        return cls(
+            smaller[:, :2],
+            larger,
+            np.array([q.mev for q in q_values], dtype=float),
+            screening=kwargs.get('screening') or 0,
+            smaller_mass_mev=smaller[:, 2],
+            r0=single_radius_constant(kwargs),
+        )
+
+    def __init__(self, smaller, larger, q_mev, screening=0, smaller_mass_mev=None,
+                 r0=DEFAULT_R0):
+        smaller, larger = np.asarray(smaller, dtype=float), np.asarray(larger, dtype=float)
+        self.smaller_a, self.smaller_z = smaller[:, 0], smaller[:, 1]
+        self.larger_a, self.larger_z = larger[:, 0], larger[:, 1]
+        self.q_mev = np.asarray(q_mev, dtype=float)
+        self.screening = np.asarray(screening, dtype=float)
+        self.smaller_mass_mev = smaller_mass_mev
+        self.r0 = np.asarray(r0, dtype=float)
+
+    def gamow(self):
+        """`GamowSuppressionFactor.value` for each row."""
+        A, A4, Z4, Q = self.larger_a, self.smaller_a, self.smaller_z, self.q_mev
+        Z = self.larger_z - self.screening
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = self.r0 * (np.power(A, 1/3) + np.power(A4, 1/3))
+            rc = Z * Z4 * 1.43998 / Q
+            r = np.where(rc <= 0, 1, rs / rc)
+            G = np.where(r >= 1, 0, np.arccos(np.sqrt(r)) - np.sqrt(r * (1. - r)))
+            m = (A * A4) / (A + A4)
+            value = 0.2708122 * Z * Z4 * G * np.sqrt(m / Q)
+        return np.where(Q <= 0, np.nan, value)
+
+    def sweep(self, screenings, r0s=None):
+        """`gamow` over a grid of rows by screening values, broadcast in a
+        single pass, or over a grid of rows by screening values by values of
+        r0 if these are given.  The screening given to the kernel, and its r0
+        if `r0s` is given, are not used.
+        """
+        screenings = np.asarray(screenings, dtype=float)
+        swept = shallow_copy(self)
+        for name in ('smaller_a', 'smaller_z', 'larger_a', 'larger_z', 'q_mev'):
+            column = getattr(self, name)
+            setattr(swept, name, column.reshape(-1, 1) if r0s is None else column.reshape(-1, 1, 1))
+        if r0s is None:
+            swept.screening = screenings.reshape(1, -1)
+        else:
+            swept.screening = screenings.reshape(1, -1, 1)
+            swept.r0 = np.asarray(r0s, dtype=float).reshape(1, 1, -1)
+        return swept.gamow()
+
+    def gamow2(self):
+        """`Gamow2.value` for each row.  Needs the masses of the smaller
+        daughters.
+        """
+        Q = self.q_mev
+        with np.errstate(divide='ignore', invalid='ignore'):
+            width = FINE_STRUCTURE_CONSTANT_MEV_FM * self.smaller_z * self.larger_z / Q
+            x = Q / width
+            t0 = np.sqrt((2 * self.smaller_mass_mev)/(HBAR_MEV_S**2 * Q))
+            t1 = self.smaller_z * self.larger_z * FINE_STRUCTURE_CONSTANT_MEV_FM
+            t2 = np.arccos(np.sqrt(x)) - np.sqrt(x * (1 - x))
+            value = t0 * t1 * t2
+        return np.where(Q <= 0, np.nan, value)
+
+    def geiger_nuttal(self):
+        """`GeigerNuttal.value` for each row."""
+        Q = self.q_mev
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = -46.83 + 1.454 * self.larger_z / np.sqrt(Q)
+        return np.where(Q <= 0, np.nan, value)
+
+
+class GamowSweep:
+    """The Gamow suppression factors of a set of two-body reactions over a
+    range of screening values.  The reactions are enumerated once and the
+    factors are computed as a single (reactions × screenings) broadcast.
+    """
+
+    @classmethod
+    def load(cls, **kwargs):
+        """Factory method taking (combination, reaction) pairs, as with
+        `Decay.load`, the screening values and optionally r0, which can be
+        several values.
+        """
+        return cls((r for _, r in kwargs['reactions']), kwargs['screenings'],
+                   r0=kwargs.get('r0'))
+
+    def __init__(self, reactions, screenings, r0=None):
+        self.r0 = nuclear_radius_constant({'r0': r0})
+        self.reactions, self.factors = [], []
+        for reaction in reactions:
+            factor = reaction.gamow()
+            if factor is None:
+                continue
+            self.reactions.append(reaction)
+            self.factors.append(factor)
+        self.screenings = np.asarray(screenings, dtype=float)
+        several = np.ndim(self.r0) > 0
+        kernel = GamowKernel.load(
+            [(f.parent, (f.smaller, f.larger)) for f in self.factors],
+            [f.q_value for f in self.factors],
+            r0=DEFAULT_R0 if several else self.r0,
+        )
+        self.values = kernel.sweep(self.screenings, self.r0 if several else None)
+        self.df = self._dataframe()
+
+    def _dataframe(self):
+        pd = load_pandas()
+        count = len(self.reactions)
+        labels = [
+            (_side(r.lvalues), _side(r.rvalues), r.q_value.kev)
+            for r in self.reactions
+        ]
+        df = pd.DataFrame(labels * len(self.screenings),
+                          columns=['parents', 'daughters', 'q_value_kev'])
+        df['screening'] = np.repeat(self.screenings, count)
+        if np.ndim(self.r0) == 0:
+            df['gamow_factor'] = self.values.T.ravel()
+            return df
+        for i, r0 in enumerate(self.r0):
+            df[r0_column('gamow_factor', r0)] = self.values[:, :, i].T.ravel()
+        return df
+
+    def to_csv(self, io):
+        """Write the table of results as .csv."""
+        self.df.to_csv(io, index=False)
+
+    def to_string(self):
+        """The table of results as a string that can be printed to the
+        console.
+        """
+        return self.df.to_string(index=False)
+
+
+def _side(values):
+    return ' + '.join(n.full_label for num, n in values for _ in range(num))
+
 
 class IsotopicDecay(Calculation):
     """From http://hyperphysics.phy-astr.gsu.edu/hbase/nuclear/alpdec.html
@@ -183,12 +395,23 @@ class IsotopicDecay(Calculation):
         return self.data[key]
 
 
+def _physical_constant(name):
+    # scipy is slow to import and only needed once a decay scenario is run.
+    import scipy.constants as cs  # pylint: disable=import-outside-toplevel
+    value, _, _ = cs.physical_constants[name]
+    return value
+
+
 class DecayScenario:
     """Compute various quantities for a given radioactive system at different
     points in time.
     """
 
-    speed_of_light, _, _ = cs.physical_constants['speed of light in vacuum']
+    @property
+    def speed_of_light(self):
+        """The speed of light in m/s."""
+        return _physical_constant('speed of light in vacuum')
+
     # hbar * c, in units of MeV.fm
     hbarc = 197.327
     # e^2 / 4pi, in units of MeV.fm
@@ -196,13 +419,53 @@ class DecayScenario:
     # Wolfram Alpha: 2.30707751e-28 m^3 kg / s^2 in MeV fm -> 1.4399645 MeV fm
     # Changed to 1.43998 to match Hermes's value
     e2_4pi = 1.43998
-    avogadros_number, _, _ = cs.physical_constants['Avogadro constant']
 
-    def __init__(self, base_df, reactions, **kwargs):
-        self.base_df = base_df.copy()
+    @property
+    def avogadros_number(self):
+        """Avogadro's number."""
+        return _physical_constant('Avogadro constant')
+
+    # The columns that depend on r0, which come once for each value of r0
+    # when several are given.
+    radius_columns = [
+        'nuclear_separation_radius_fm',
+        'barrier_assault_frequency',
+        'radius_ratio',
+        'barrier_height_mev',
+        'gamow_factor',
+        'tunneling_probability',
+        'partial_decay_constant',
+        'isotope_decay_constant',
+        'partial_half_life',
+        'remaining_active_atoms',
+        'partial_activity',
+        'watts',
+    ]
+
+    # The stages of the calculation, in order, with the options read by each
+    # one.  The result of each stage is memoized on its options and those of
+    # the stages before it, so a change to, e.g., `seconds` only reruns
+    # `calculate_products`.
+    stages = [
+        ('calculate_preliminaries', ('screening', 'r0')),
+        ('calculate_gamow_factor', ()),
+        ('calculate_decay_constant', ()),
+        ('calculate_products', ('seconds', 'moles', 'isotopic_fraction', 'active_fraction')),
+    ]
+    # The number of stage results held on to by a scenario and the scenarios
+    # recalculated from it.
+    memo_size = 64
+
+    def __init__(self, base_df, reactions, memo=None, **kwargs):
+        self.base_df = base_df.copy() if memo is None else base_df
         self.reactions = reactions
+        if kwargs.get('r0') is not None:
+            kwargs['r0'] = nuclear_radius_constant(kwargs)
         self.kwargs = kwargs
-        self.df = self.calculate(base_df, kwargs)
+        r0 = nuclear_radius_constant(kwargs)
+        self.r0s = r0 if np.ndim(r0) else None
+        self._memo = OrderedDict() if memo is None else memo
+        self.df = self.calculate(self.base_df, kwargs, key=('base',))
 
     def to_csv(self, io):
         """Convert the calculated dataframe to .csv."""
@@ -218,46 +481,153 @@ class DecayScenario:
         """
         return self.df.to_string()
 
-    def calculate(self, df, kwargs):
-        """Return a Pandas dataframe with various steps in the calculation."""
-        df = df.copy()
-        df = self.calculate_preliminaries(df, kwargs)
-        df = self.calculate_gamow_factor(df, kwargs)
-        df = self.calculate_decay_constant(df, kwargs)
-        df = self.calculate_products(df, kwargs)
+    def calculate(self, df, kwargs, key=None):
+        """Return a Pandas dataframe with various steps in the calculation.
+        With several values of r0, the rows are repeated for each of them and
+        carried through the calculation together, and the columns that depend
+        on r0 are then split out into a column for each value.  Given a `key`
+        that identifies the input dataframe, the result of each stage is
+        memoized, and the memoized frames must not be modified.
+        """
+        rows = len(df)
+        if self.r0s is not None:
+            pd = load_pandas()
+            df = pd.concat([df] * len(self.r0s), ignore_index=True)
+            df['r0'] = np.repeat(self.r0s, rows)
+        for name, options in self.stages:
+            if key is not None:
+                key += tuple((o, _frozen(kwargs.get(o))) for o in options)
+            df = self._stage(name, key, df, kwargs)
+        if self.r0s is not None:
+            df = self._split_radius_columns(df, rows)
         return df
 
+    def _stage(self, name, key, df, kwargs):
+        if key is None:
+            return getattr(self, name)(df.copy(), kwargs)
+        result = self._memo.get((name, key))
+        if result is not None:
+            self._memo.move_to_end((name, key))
+            return result
+        result = self._memo[(name, key)] = getattr(self, name)(df.copy(), kwargs)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return result
+
+    def _split_radius_columns(self, df, rows):
+        columns = [c for c in self.radius_columns if c in df]
+        split = df.iloc[:rows].drop(columns=columns + ['r0'])
+        for i, r0 in enumerate(self.r0s):
+            block = df.iloc[i * rows:(i + 1) * rows]
+            for column in columns:
+                split[r0_column(column, r0)] = block[column].to_numpy()
+        return split
+
+    def columns(self, names):
+        """The names of the columns holding a set of quantities, with a
+        column for each value of r0 for those that depend on it.
+        """
+        columns = []
+        for name in names:
+            if self.r0s is None or name not in self.radius_columns:
+                columns.append(name)
+            else:
+                columns.extend(r0_column(name, r0) for r0 in self.r0s)
+        return columns
+
     def calculate_gamow_factor(self, df, kwargs):
         """Gamow factor to be calculated by subclasses."""
         raise NotImplementedError
 
     def recalculate(self, **kwargs):
         """What does this scenario look like under different assumptions?"""
+        if 'r0' in kwargs:
+            kwargs['r0'] = nuclear_radius_constant(kwargs)
         merged = {**self.kwargs, **kwargs}
         if merged == self.kwargs:
             return self
-        return self.__class__(self.base_df, self.reactions, **merged)
+        return self.__class__(self.base_df, self.reactions, memo=self._memo, **merged)
 
     def activity(self, **kwargs):
-        """What is the activity of this decay?"""
-        return self.recalculate(**kwargs).df.partial_activity.sum()
+        """What is the activity of this decay?  With several values of r0,
+        an array with the activity for each of them.
+        """
+        return self.recalculate(**kwargs).total('partial_activity')
 
     def power(self, **kwargs):
         """What is the power in watts given off by this decay?"""
-        watts = self.recalculate(**kwargs).df.watts.sum()
+        watts = self.recalculate(**kwargs).total('watts')
         return Power.load(watts=watts)
 
     def remaining_active_atoms(self, **kwargs):
         """How many active nuclides are left?"""
-        return self.recalculate(**kwargs).df.remaining_active_atoms.sum()
+        return self.recalculate(**kwargs).total('remaining_active_atoms')
+
+    def total(self, name):
+        """The sum of a column over the decays, or an array with the sum of
+        each of its columns if there are several values of r0.
+        """
+        if self.r0s is None:
+            return self.df[name].sum()
+        return np.array([self.df[c].sum() for c in self.columns([name])])
+
+    def sweep(self, screenings):
+        """Compute the scenario for each of a range of screening values in a
+        single pass, and return a tidy dataframe with a block of rows for each
+        screening value.
+        """
+        pd = load_pandas()
+        screenings = np.asarray(screenings, dtype=float)
+        df = pd.concat([self.base_df] * len(screenings), ignore_index=True)
+        df['screening'] = np.repeat(screenings, len(self.base_df))
+        return self.calculate(df, self.kwargs, key=('sweep', _frozen(screenings)))
+
+    def timeseries(self, times):
+        """The remaining active atoms, activity and watts of each parent at
+        each of an array of times in seconds, computed as a single (decays ×
+        times) broadcast from the decay constants of this scenario, and
+        summed over the decays of each parent as `activity`, `power` and
+        `remaining_active_atoms` are.  Returns a tidy dataframe with a block
+        of rows for each time, and with a set of columns for each value of r0
+        if there are several.
+        """
+        pd = load_pandas()
+        times = np.asarray(times, dtype=float)
+        codes, parents = pd.factorize(self.df.parent)
+
+        def per_parent(values):
+            sums = np.zeros((len(parents), len(times)))
+            np.add.at(sums, codes, np.nan_to_num(values, nan=0.0))
+            return sums.T.ravel()
+
+        df = pd.DataFrame({
+            'seconds': np.repeat(times, len(parents)),
+            'parent': np.tile(np.asarray(parents, dtype=object), len(times)),
+        })
+        starting = self.df.starting_active_atoms.to_numpy(dtype=float)[:, np.newaxis]
+        joules = self.df.deposited_q_value_joules.to_numpy(dtype=float)[:, np.newaxis]
+        for r0 in self.r0s or [None]:
+            column = '{}' if r0 is None else r0_column('{}', r0)
+            isotope = self.df[column.format('isotope_decay_constant')].to_numpy(dtype=float)
+            partial = self.df[column.format('partial_decay_constant')].to_numpy(dtype=float)
+            remaining = starting * np.exp(-isotope[:, np.newaxis] * times)
+            activity = partial[:, np.newaxis] * remaining
+            df[column.format('remaining_active_atoms')] = per_parent(remaining)
+            df[column.format('partial_activity')] = per_parent(activity)
+            df[column.format('watts')] = per_parent(activity * joules)
+        return df
 
     def calculate_preliminaries(self, df, kwargs):
-        """Compute various starting quantities for this result."""
-        df['screening'] = kwargs.get('screening') or 0
+        """Compute various starting quantities for this result.  A
+        `screening` column that is already present is left alone.
+        """
+        if 'screening' not in df:
+            df['screening'] = kwargs.get('screening') or 0
+        r0 = df.r0 if 'r0' in df else nuclear_radius_constant(kwargs)
         df['screened_heavier_daughter_z'] = df.heavier_daughter_z - df.screening
         df['lighter_ke_mev'] = df.q_value_mev / \
             (1 + df.lighter_mass_mev / df.heavier_daughter_mass_mev)
-        df['nuclear_separation_radius_fm'] = 1.2 * (np.power(df.lighter_daughter_a, 1./3) + \
+        df['nuclear_separation_radius_fm'] = r0 * (np.power(df.lighter_daughter_a, 1./3) + \
             np.power(df.heavier_daughter_a, 1./3))
         df['lighter_velocity_m_per_s'] = np.sqrt(2 * df.lighter_ke_mev / df.lighter_mass_mev) * \
             self.speed_of_light
@@ -274,7 +644,8 @@ class DecayScenario:
         """Compute intermediate values for this result."""
         df['tunneling_probability'] = np.exp(-2 * df.gamow_factor)
         df['partial_decay_constant'] = df.tunneling_probability * df.barrier_assault_frequency
-        df['isotope_decay_constant'] = df.groupby(['parent_a', 'parent_z']) \
+        keys = ['screening', 'r0'] if 'r0' in df else ['screening']
+        df['isotope_decay_constant'] = df.groupby(keys + ['parent_a', 'parent_z']) \
             .partial_decay_constant.transform(np.sum)
         df['partial_half_life'] = np.where(
             df.partial_decay_constant > 0,
@@ -370,6 +741,7 @@ class Decay:
         self.df = self._initial_dataframe()
 
     def _initial_dataframe(self):
+        pd = load_pandas()
         rows = []
         for decay in self.decays:
             rows.append([decay[c] for c in self.initial_column_names])
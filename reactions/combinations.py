@@ -3,20 +3,24 @@ nuclear reaction using various models.
 """
 # pylint: disable=too-many-instance-attributes, no-self-use, no-member
 # pylint: disable=too-few-public-methods, unsubscriptable-object
-import gzip
-import hashlib
 import itertools
-import json
 import logging
+import math
 import operator
 import os
 from os.path import expanduser
-import pickle
+import struct
+import zlib
 
-from .nubase import Nuclides, Electron
+import numpy as np
+
+from .cache import CombinationStore, MemoryCache
+from .nubase import Nuclides, Electron, ELECTRON, GAMMA_PHOTON
 from .calculations import (
     IsotopicDecay,
+    GamowKernel,
     GamowSuppressionFactor,
+    single_radius_constant,
     GeigerNuttal,
     Gamow2,
     ReactionEnergy,
@@ -25,29 +29,30 @@ from .calculations import (
 
 LENRMC_DIR = os.path.join(expanduser('~'), '.reactions')
 
-
-class RejectCombination(RuntimeError):
-    """Sentinel exception used to flag a specific combination of parent and
-    daughter nuclides as being impossible.
-    """
-    pass
+_UNSET = object()
 
 
-class GammaPhoton:
-    """Represent a gamma photon that results from a nuclear reaction."""
-
-    def __init__(self):
-        self.mass_number = 0
-        self.is_baryon = False
-        self.full_label = self.label = 'ɣ'
-        self.is_stable = False
-        self.spin_and_parity = '1-'
-        self.numbers = (0, 0)
-        self.notes = {'ɣ'}
+class Reaction:
+    """Model the parents and possible daughters of a nuclear reaction.
 
+    Reactions are created in large numbers and most of them are filtered out
+    or never printed, so the Q-value, notes and Gamow factor are computed on
+    first access and then held on to.
+    """
 
-class Reaction:
-    """Model the parents and possible daughters of a nuclear reaction."""
+    __slots__ = (
+        'model_name',
+        'initial_lvalues',
+        'rvalues',
+        'daughter_count',
+        '_kwargs',
+        '_q_value',
+        '_is_stable',
+        '_any_excited',
+        '_notes',
+        '_decay_components',
+        '_gamow_value',
+    )
 
     @classmethod
     def load(cls, **kwargs):
@@ -65,26 +70,82 @@ class Reaction:
         't':   't',
     }
 
+    lvalue_delim = rvalue_delim = '+'
+
     def __init__(self, lvalues, rvalues, **kwargs):
         self.model_name = kwargs.get('model')
         self.initial_lvalues = list(lvalues)
         self.rvalues = list(rvalues)
-        self.q_value = ReactionEnergy(self).value
-        self.is_stable = self._is_stable()
-        self.any_excited = self._any_excited()
-        self.lvalue_delim = self.rvalue_delim = '+'
+        self._kwargs = kwargs
+        self._q_value = self._is_stable = self._any_excited = self._notes = None
+        self._decay_components = self._gamow_value = _UNSET
         # Photons are not counted as a daughter.
         self.daughter_count = sum(n for (n, d) in self.rvalues)
         if self.is_single_body and len(self.initial_lvalues) > 1:
-            self.rvalues.append((1, GammaPhoton()))
-        gamow = self.gamow(**kwargs)
-        self.gamow_value = gamow.value() if gamow else -1
+            self.rvalues.append((1, GAMMA_PHOTON))
+
+    @property
+    def q_value(self):
+        """The energy released by the reaction."""
+        if self._q_value is None:
+            self._q_value = ReactionEnergy(self).value
+        return self._q_value
+
+    @property
+    def is_stable(self):
+        """Are all of the daughters stable?  Photons are not counted."""
+        if self._is_stable is None:
+            self._is_stable = all(d.is_stable for num, d in self.rvalues if d is not GAMMA_PHOTON)
+        return self._is_stable
+
+    @property
+    def any_excited(self):
+        """Are any of the parents or daughters in an excited state?"""
+        if self._any_excited is None:
+            combined = self.rvalues + self.initial_lvalues
+            self._any_excited = any(n.is_excited for num, n in combined)
+        return self._any_excited
+
+    @property
+    def gamow_value(self):
+        """The Gamow suppression factor, or -1 if there isn't one."""
+        if self._gamow_value is _UNSET:
+            single_radius_constant(self._kwargs)
+            gamow = self.gamow(**self._kwargs)
+            self._gamow_value = gamow.value() if gamow else -1
+        return self._gamow_value
+
+    @property
+    def gamow_value_is_set(self):
+        """Has the Gamow suppression factor been computed yet?"""
+        return self._gamow_value is not _UNSET
+
+    def set_gamow_value(self, value):
+        """Hold on to a Gamow suppression factor computed elsewhere, e.g., by
+        `load_gamow_values`.
+        """
+        self._gamow_value = value
+
+    @classmethod
+    def load_gamow_values(cls, reactions, **kwargs):
+        """Compute the Gamow suppression factors of a list of reactions in a
+        single pass with `GamowKernel`, and hold on to them as their
+        `gamow_value`.
+        """
+        pending = [r for r in reactions if not r.gamow_value_is_set]
+        decays = [r for r in pending if r.components is not None]
+        kernel = GamowKernel.load([r.components for r in decays],
+                                  [r.q_value for r in decays], **kwargs)
+        for reaction in pending:
+            reaction.set_gamow_value(-1)
+        for reaction, value in zip(decays, kernel.gamow().tolist()):
+            reaction.set_gamow_value(value)
 
     @property
     def lvalues(self):
         """The parents of the reaction."""
         if self.model_name == 'stimulated-decay':
-            return [(1, Electron())] + self.initial_lvalues
+            return [(1, ELECTRON)] + self.initial_lvalues
         return self.initial_lvalues
 
     @property
@@ -92,6 +153,8 @@ class Reaction:
         """Notes that are relevant to this reaction to be included in the
         output.
         """
+        if self._notes is not None:
+            return self._notes
         notes = set()
         for _, daughter in self.rvalues:
             note = self._noteworthy.get(daughter.label)
@@ -104,20 +167,26 @@ class Reaction:
             notes.add('in nature')
         for _, daughter in self.rvalues:
             notes |= daughter.notes
-        return notes
+        self._notes = frozenset(notes)
+        return self._notes
 
     def _neutron_transfer(self, daughter, parent):
         result = map(operator.add, parent.numbers, (1, 0))
         return daughter.numbers == tuple(result)
 
-    def _is_stable(self):
-        return all(d.is_stable for num, d in self.rvalues)
+    @property
+    def components(self):
+        """The (parent, (smaller, larger)) components of a two-body reaction,
+        or None if the reaction does not have two baryon daughters.
+        """
+        return self._components()
 
-    def _any_excited(self):
-        combined = self.rvalues + self.initial_lvalues
-        return any(n.is_excited for num, n in combined)
+    def _components(self):
+        if self._decay_components is _UNSET:
+            self._decay_components = self._find_decay_components()
+        return self._decay_components
 
-    def _decay_components(self):
+    def _find_decay_components(self):
         values = [p for num, p in self.rvalues if p.is_baryon]
         if len(values) != 2:
             return None
@@ -143,14 +212,14 @@ class Reaction:
         """Do the Geiger-Nuttal computation for the decay components of this
         decay.
         """
-        return GeigerNuttal.load(self._decay_components(), self.q_value)
+        return GeigerNuttal.load(self._components(), self.q_value)
 
     def gamow(self, **kwargs):
         """Compute the gamow suppression factor and related details for a given
         reaction.
         """
         return GamowSuppressionFactor.load(
-            self._decay_components(),
+            self._components(),
             self.q_value,
             **kwargs,
         )
@@ -160,12 +229,12 @@ class Reaction:
         a given reaction using a different method from the other calculation
         with the same name.
         """
-        return Gamow2.load(self._decay_components(), self.q_value)
+        return Gamow2.load(self._components(), self.q_value)
 
     def decay(self, **kwargs):
         """Compute possible decay products for a given pair of parent nuclides."""
         return IsotopicDecay.load(
-            self._decay_components(),
+            self._components(),
             self.q_value,
             **kwargs
         )
@@ -179,15 +248,144 @@ def vectors3(num):
             yield (j - k, k, i)
 
 
+def partitions3(totals):
+    """Produce the distinct sets of up to three daughters, as sorted tuples of
+    (mass number, atomic number) pairs, that add up to the input totals.
+
+    The sets come out in the order in which they are first seen when crossing
+    `vectors3` over the mass number with `vectors3` over the atomic number,
+    but each set is generated exactly once.  The three slots (s0, s1, s2) of
+    that crossing are walked in the order (m2, m1, p2, p1), with empty slots
+    filled by (0, 0), and the loop bounds only admit the arrangement of a set
+    that comes first in that order: s2 <= s1, s1 <= s0 if p1 > 0 and s2 <= s0
+    if p2 > 0, with s0 always holding at least one proton.
+    """
+    mass_number, atomic_number = totals
+    for m2 in range(0, (mass_number - 1) // 2 + 1):
+        for m1 in range(m2, mass_number - m2):
+            m0 = mass_number - m1 - m2
+            p2_max = min(m2, atomic_number - 1)
+            if m2 > m0:
+                p2_max = min(p2_max, 0)
+            for p2 in range(0, p2_max + 1):
+                low = max(p2 if m1 == m2 else 0, atomic_number - p2 - m0)
+                high = min(m1, atomic_number - p2 - 1)
+                if m2 == m0 and p2 >= 1:
+                    high = min(high, atomic_number - 2 * p2)
+                if m1 > m0:
+                    high = min(high, 0)
+                elif m1 == m0:
+                    high = min(high, (atomic_number - p2) // 2)
+                for p1 in range(low, high + 1):
+                    daughters = [(m0, atomic_number - p1 - p2)]
+                    if m1:
+                        daughters.append((m1, p1))
+                    if m2:
+                        daughters.append((m2, p2))
+                    yield tuple(sorted(daughters))
+
+
+class Partitions:
+    """An immutable, compact form of the daughter partitions for a set of
+    totals.  The (mass number, atomic number) pairs of all of the partitions
+    are held in one int16 array, with an offsets array marking where each
+    partition starts, and tuples are only built when the partitions are
+    iterated.
+
+    The encoded form, which is what goes into the on-disk store, is a short
+    header giving the format version and the array lengths, followed by the
+    length of each partition and then the mass numbers and the atomic
+    numbers as two columns, compressed together with zlib.  Laid out this
+    way the arrays are very repetitive, and compress to a small fraction of
+    their size.
+    """
+    magic = b'RPARTS'
+    version = 2
+    header = struct.Struct('<6sHII')
+
+    @classmethod
+    def load(cls, partitions):
+        """Pack an iterable of tuples of (mass number, atomic number) pairs."""
+        pairs, offsets = [], [0]
+        for daughters in partitions:
+            pairs.extend(daughters)
+            offsets.append(len(pairs))
+        numbers = np.array(pairs, dtype=np.int16).reshape(-1, 2)
+        return cls(numbers, np.array(offsets, dtype=np.int32))
+
+    @classmethod
+    def decode(cls, buffer):
+        """Return the partitions held in an encoded buffer, or None if the
+        buffer is from a different version of the format, or is truncated or
+        otherwise not what its header says it is.  The arrays are decompressed
+        into new memory rather than read in place from the buffer.
+        """
+        if len(buffer) < cls.header.size:
+            return None
+        magic, version, count, pairs = cls.header.unpack_from(buffer)
+        if magic != cls.magic or version != cls.version:
+            return None
+        try:
+            data = zlib.decompress(bytes(buffer[cls.header.size:]))
+        except zlib.error:
+            return None
+        if len(data) != 2 * count + 4 * pairs:
+            return None
+        lengths = np.frombuffer(data, dtype='<u2', count=count)
+        offsets = np.zeros(count + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        if offsets[-1] != pairs:
+            return None
+        numbers = np.frombuffer(data, dtype='<i2', offset=2 * count).reshape(2, -1)
+        return cls(np.ascontiguousarray(numbers.T), offsets)
+
+    def __init__(self, numbers, offsets):
+        self.numbers = numbers
+        self.offsets = offsets
+        self.numbers.flags.writeable = False
+        self.offsets.flags.writeable = False
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        """The memory held by the arrays."""
+        return self.numbers.nbytes + self.offsets.nbytes
+
+    def encode(self):
+        """Return the partitions as bytes that can be passed to `decode`: the
+        header, and then the lengths and the two columns of numbers compressed
+        with zlib.
+        """
+        header = self.header.pack(self.magic, self.version, len(self), len(self.numbers))
+        data = b''.join((
+            np.diff(self.offsets).astype('<u2').tobytes(),
+            self.numbers.T.astype('<i2').tobytes(),
+        ))
+        return header + zlib.compress(data)
+
+    def __iter__(self):
+        pairs = list(map(tuple, self.numbers.tolist()))
+        offsets = self.offsets.tolist()
+        for start, stop in zip(offsets, offsets[1:]):
+            yield tuple(pairs[start:stop])
+
+
 class CalculateCombinations:
     """Compute the possible combinations of neutrons and protons in the
     daughters for a given set of parent nuclides, using a cached result
-    if one is available.
+    if one is available.  Results are looked up in an in-process LRU first,
+    and then in the on-disk store.
     """
-    basedir = os.path.expanduser('~/.reactions/objects')
+    memory = MemoryCache()
+    store = CombinationStore()
 
     def __init__(self, totals):
-        self.totals = totals
+        self.totals = tuple(totals)
         self.mass_number, self.atomic_number = totals
 
     def __iter__(self):
@@ -195,63 +393,29 @@ class CalculateCombinations:
         and neutrons for a given pair of parent nuclides.  These are converted
         to daughter nuclides at a later step.
         """
-        iterator = self._cached_results()
-        if iterator:
-            yield from iterator
-            return
-
-        results, seen = [], set()
-        for masses in vectors3(self.mass_number):
-            for protons in vectors3(self.atomic_number):
-                daughters = []
-
-                try:
-                    for i, mass in enumerate(masses):
-                        proton_count = protons[i]
-                        if mass < proton_count:
-                            raise RejectCombination
-                        pair = (mass, proton_count)
-                        if (0, 0) == pair:
-                            continue
-                        daughters.append(pair)
-                except RejectCombination:
-                    continue
-
-                daughters = tuple(sorted(daughters))
-                if daughters in seen:
-                    continue
-                seen.add(daughters)
-
-                results.append(daughters)
-                yield daughters
-
-        self._cache_results(results)
-
-    @property
-    def _cache_key(self):
-        string = json.dumps(self.totals, sort_keys=True).encode('utf-8')
-        return hashlib.sha1(string).hexdigest()
-
-    @property
-    def cache_path(self):
-        """File path for the cached results for this reaction."""
-        return os.path.join(self.basedir, self._cache_key)
-
-    def _cache_results(self, results):
-        try:
-            os.makedirs(self.basedir)
-        except FileExistsError:
-            pass
-        with gzip.open(self.cache_path, 'wb+') as file:
-            pickle.dump(results, file)
+        return iter(self.partitions())
+
+    def partitions(self):
+        """Return the possible combinations as a `Partitions` instance."""
+        partitions = self.memory.get(self.totals)
+        if partitions is not None:
+            return partitions
+        partitions = self._cached_results()
+        if partitions is None:
+            partitions = Partitions.load(partitions3(self.totals))
+            self._cache_results(partitions)
+        self.memory.put(self.totals, partitions)
+        return partitions
+
+    def _cache_results(self, partitions):
+        self.store.put(self.totals, partitions.encode())
 
     def _cached_results(self):
-        if not os.path.exists(self.cache_path):
+        value = self.store.get(self.totals)
+        if value is None:
             return None
         logging.info('reading previously computed values from cache')
-        with gzip.open(self.cache_path, 'rb') as file:
-            combinations = pickle.loads(file.read())
-        return combinations
+        return Partitions.decode(value)
 
 
 def calculate_combinations(totals):
@@ -259,6 +423,11 @@ def calculate_combinations(totals):
     return iter(CalculateCombinations(totals))
 
 
+def calculate_partitions(totals):
+    """Public interface returning the combinations as a `Partitions` instance."""
+    return CalculateCombinations(totals).partitions()
+
+
 def add_numbers(*numbers):
     """Add the mass and atomic numbers for different pairs of input."""
     return tuple(map(operator.add, *numbers))
@@ -282,16 +451,38 @@ class Model:
     """Model is the base class for several different ways of calculating
     a set of possible nuclear reactions from a given set of inputs.
     """
+    # Whether `parents` yields the same parents whatever the daughters are,
+    # which lets the Q-value of a set of daughters be bounded in advance.
+    fixed_parents = True
+    # Whether `sort_key` needs the Gamow factor of every reaction.
+    sorts_by_gamow = False
+
     def sort_key(self, reaction):
         """Sort reactions according to the energy released."""
         kev = reaction.q_value.kev
         return kev > 0, kev
 
+    def __call__(self, reactants):
+        """The (mass number, atomic number) partitions of the daughters, to
+        be computed by subclasses.
+        """
+        raise NotImplementedError
+
     def parents(self, parents, _):
         """Default no-op implementation of the parents method. In some
         subclasses, the parents are modified here."""
         yield parents
 
+    def partitions(self, reactants):
+        """The daughters produced by `__call__`, as a `Partitions` instance."""
+        return Partitions.load(self(reactants))
+
+    def family(self, _):
+        """A key shared by the reactants that give the same daughters, or None
+        if there is no such key.
+        """
+        return None
+
     def _smaller_and_larger(self, reactants):
         "This helper method assumes a two-body reaction."
         num0, smaller = min(reactants, key=lambda t: t[1].mass_number)
@@ -305,9 +496,17 @@ class StandardModel(Model):
     or whistles.
     """
     def __call__(self, reactants):
+        return calculate_combinations(self._totals(reactants))
+
+    def partitions(self, reactants):
+        return calculate_partitions(self._totals(reactants))
+
+    def family(self, reactants):
+        return self._totals(reactants)
+
+    def _totals(self, reactants):
         numbers = [num * n.numbers for num, n in reactants]
-        mass_number, atomic_number = add_numbers(*numbers)
-        return calculate_combinations((mass_number, atomic_number))
+        return add_numbers(*numbers)
 
 
 class PionExchangeModel(Model):
@@ -379,7 +578,7 @@ class ElectronMediatedDecayModel(Model):
     ]
 
     def parents(self, parents, _):
-        yield list(parents) + [(1, Electron())]
+        yield list(parents) + [(1, ELECTRON)]
 
     def __call__(self, reactants):
         assert len(reactants) == 1
@@ -395,6 +594,7 @@ class SeparatedNuclideModel(Model):
     nuclide, would fission in an exothermic reaction, if fission
     were feasible.
     """
+    fixed_parents = False
     nuclides = Nuclides.data()
 
     def parents(self, parents, daughters):
@@ -407,7 +607,7 @@ class SeparatedNuclideModel(Model):
                 continue
             if parent.mass_number == daughter.mass_number:
                 continue
-            yield [(1, parent)] + [(1, Electron())]
+            yield [(1, parent)] + [(1, ELECTRON)]
 
     def __call__(self, reactants):
         assert len(reactants) == 1
@@ -423,10 +623,16 @@ class ElectronMediatedFissionModel(Model):
     isotopes.
     """
 
+    sorts_by_gamow = True
+
     def sort_key(self, reaction):
+        # A reaction with a Q-value that is not positive has a NaN Gamow
+        # factor, which would leave the keys unorderable; it goes last.
         gamow = reaction.gamow_value
         kev = reaction.q_value.kev
-        return -gamow, kev > 0, kev
+        if math.isnan(gamow):
+            return False, 0, kev > 0, kev
+        return True, -gamow, kev > 0, kev
 
     def __call__(self, reactants):
         assert len(reactants) == 1
@@ -434,6 +640,14 @@ class ElectronMediatedFissionModel(Model):
         assert num == 1
         return calculate_combinations(nuclide0.numbers)
 
+    def partitions(self, reactants):
+        (_, nuclide0), = reactants
+        return calculate_partitions(nuclide0.numbers)
+
+    def family(self, reactants):
+        (_, nuclide0), = reactants
+        return nuclide0.numbers
+
 
 MODELS = {
     'standard':             StandardModel(),
@@ -467,7 +681,8 @@ class Combinations:
         self._lower_bound = float(kwargs.get('lower_bound', 0))
         self._upper_bound = float(kwargs.get('upper_bound', 500000))
         self._excited = kwargs.get('excited')
-        self.daughter_count = {int(c) for c in kwargs.get('daughter_count', '').split(',') if c}
+        self.plan = FilterPlan(**kwargs)
+        self.daughter_count = self.plan.daughter_count
 
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__, self._parents)
@@ -476,14 +691,47 @@ class Combinations:
         """Sort our reaction output."""
         return self._model.sort_key(reactions)
 
+    # Slack for the difference in rounding between the mass excess bounds
+    # and the Q-values computed later on.
+    _q_epsilon_kev = 1e-6
+
+    def mass_excess_window(self):
+        """The range that the total mass excess of a set of daughters must
+        fall in for the reaction to be within the Q-value bounds, or None if
+        the parents depend on the daughters.
+        """
+        if not self._model.fixed_parents:
+            return None
+        parents = next(iter(self._model.parents(self._parents, None)))
+        kev = sum(num * p.mass_excess_kev for num, p in parents)
+        return (kev - self._upper_bound - self._q_epsilon_kev,
+                kev - self._lower_bound + self._q_epsilon_kev)
+
     def _reactions(self):
-        nuclides = Nuclides.data()
+        grid = self.plan.isomers()
+        window = self.mass_excess_window()
         for daughters in self._daughters():
-            isomers = [nuclides.isomers[pair] for pair in daughters]
+            if not self.plan.allows_count(len(daughters)):
+                continue
+            isomers = [grid[pair] for pair in daughters]
             if not all(isomers):
                 continue
+            if window and not self._within(window, grid, daughters):
+                continue
             yield from itertools.product(*isomers)
 
+    def _within(self, window, isomers, daughters):
+        """Whether any of the isomers of a set of daughters could give a
+        Q-value within the bounds.
+        """
+        lowest = highest = 0
+        for pair in daughters:
+            low, high = isomers.mass_excess_range(pair)
+            lowest += low
+            highest += high
+        lower, upper = window
+        return highest >= lower and lowest < upper
+
     def _daughters(self):
         return self._model(self._parents)
 
@@ -498,24 +746,299 @@ class Combinations:
                 yield reaction
             return
 
-        for daughters in self._reactions():
-            all_parents = self._model.parents(self._parents, daughters)
-            for parents in all_parents:
-                rvalues = ((1, d) for d in daughters)
-                reaction = Reaction(parents, rvalues, **self._kwargs)
-                if not self._allowed(reaction):
-                    continue
-                yield reaction
+        if not self.from_daughter_ids:
+            for daughters in self._reactions():
+                all_parents = self._model.parents(self._parents, daughters)
+                for parents in all_parents:
+                    reaction = self.reaction(parents, ((1, d) for d in daughters))
+                    if not self._allowed(reaction):
+                        continue
+                    yield reaction
+            return
+
+        parents = self.parents()
+        for ids in self.daughter_ids(parents):
+            yield from self.reactions_from_ids(parents, ids)
+
+    @property
+    def from_daughter_ids(self):
+        """Whether the reactions share a fixed set of parents and come from
+        matrices of daughter ids, as given by `daughter_ids`.
+        """
+        return 'daughters' not in self._kwargs and self._model.fixed_parents
+
+    def daughter_ids(self, parents):
+        """Yield a matrix of the ids of the allowed daughters for each batch
+        of products, one reaction to a row, padded on the right with -1.
+        """
+        for products in self.daughter_family().batches([self.mass_excess_window()]):
+            yield products.ids[self.allowed_rows(parents, products)]
+
+    def reaction(self, lvalues, rvalues):
+        """Return a reaction between the given parents and daughters, with
+        the options given to this set of combinations.
+        """
+        return Reaction(lvalues, rvalues, **self._kwargs)
+
+    def reactions_from_ids(self, parents, ids):
+        """Yield the reactions for a matrix of daughter ids, one reaction to a
+        row, padded on the right with -1.
+        """
+        nuclides = Nuclides.data()
+        reactions = []
+        for row in ids.tolist():
+            daughters = nuclides.by_ids(i for i in row if i >= 0)
+            reactions.append(self.reaction(parents, ((1, d) for d in daughters)))
+        self.load_gamow_values(reactions)
+        yield from reactions
+
+    def load_gamow_values(self, reactions):
+        """Compute the Gamow factors of a batch of reactions in one pass, if
+        they are going to be printed or sorted on.
+        """
+        if self._kwargs.get('gamow') or self._model.sorts_by_gamow:
+            Reaction.load_gamow_values(reactions, **self._kwargs)
+
+    def parents(self):
+        """The parents of every reaction, for models whose parents do not
+        depend on the daughters.
+        """
+        return list(next(iter(self._model.parents(self._parents, None))))
+
+    def daughter_family(self):
+        """The isomer products of the daughters, as a `DaughterFamily`."""
+        return DaughterFamily(self._model.partitions(self._parents), self.plan)
+
+    def family_key(self):
+        """A key that is shared by the combinations whose daughters come from
+        the same partitions, or None if the daughters cannot be shared.
+        """
+        if not self.from_daughter_ids:
+            return None
+        key = self._model.family(self._parents)
+        return None if key is None else (self.model_name, self.plan.key, key)
+
+    def allowed_rows(self, parents, products):
+        """The conditions of `_allowed` that are left once the `FilterPlan`
+        has been applied, computed as a boolean mask over a batch of
+        `Products` for a given set of parents.  The Q-values come out the same
+        as those of `ReactionEnergy`, since the mass excess of the daughters
+        is summed in the same order.
+        """
+        kev = sum(num * p.mass_excess_kev for num, p in parents) - products.mass_excess_kev
+        allowed = (kev > self._lower_bound) & (kev <= self._upper_bound)
+        if not self._excited and any(p.is_excited for _, p in parents):
+            allowed[:] = False
+        return allowed
 
     def _allowed(self, reaction):
         conditions = [
             reaction.q_value.kev > self._lower_bound,
             reaction.q_value.kev <= self._upper_bound,
+            self.plan.allows_count(reaction.daughter_count),
         ]
-        if self.daughter_count:
-            conditions.append(
-                any(c == reaction.daughter_count for c in self.daughter_count)
-            )
         if not self._excited:
             conditions.append(not reaction.any_excited)
+        conditions.append(all(
+            self.plan.allows_daughter(d) for _, d in reaction.rvalues if d is not GAMMA_PHOTON))
         return all(conditions)
+
+
+class FilterPlan:
+    """Push each of the filters on the daughters of a reaction down to the
+    earliest stage at which it can be decided.  The number of daughters is
+    known from the length of a partition, before any isomers are looked up,
+    and the filters on single daughters, i.e., excited states, stability and
+    a minimum half-life, are applied to the isomers of each cell before the
+    product is taken.  Only the Q-value bounds are left to be checked on each
+    product, so the rejected products are never built.
+    """
+
+    def __init__(self, **kwargs):
+        self.daughter_count = {int(c) for c in kwargs.get('daughter_count', '').split(',') if c}
+        self.excited = bool(kwargs.get('excited'))
+        self.stable_daughters = bool(kwargs.get('stable_daughters'))
+        min_half_life = kwargs.get('min_half_life')
+        self.min_half_life = None if min_half_life is None else float(min_half_life)
+
+    def __repr__(self):
+        return '{}{}'.format(self.__class__.__name__, self.key)
+
+    @property
+    def key(self):
+        """A key that is shared by the plans that filter in the same way."""
+        return (tuple(sorted(self.daughter_count)), self.excited,
+                self.stable_daughters, self.min_half_life)
+
+    def allows_count(self, count):
+        """Whether a set of daughters of a given size can pass."""
+        return not self.daughter_count or count in self.daughter_count
+
+    def allows_counts(self, counts):
+        """`allows_count` as a boolean mask over an array of sizes."""
+        if not self.daughter_count:
+            return np.ones(len(counts), dtype=bool)
+        return np.isin(counts, list(self.daughter_count))
+
+    def allows_daughter(self, daughter):
+        """Whether a single daughter can pass."""
+        if not self.excited and daughter.is_excited:
+            return False
+        if self.stable_daughters and not daughter.is_stable:
+            return False
+        if self.min_half_life is not None and \
+                not daughter.half_life_seconds >= self.min_half_life:
+            return False
+        return True
+
+    def members(self, nuclides):
+        """`allows_daughter` as a boolean mask over the nuclide ids, or None
+        if every nuclide passes.
+        """
+        members = np.ones(len(nuclides), dtype=bool)
+        if not self.excited:
+            members &= ~nuclides.is_excited
+        if self.stable_daughters:
+            members &= nuclides.is_stable
+        if self.min_half_life is not None:
+            members &= nuclides.half_life_seconds >= self.min_half_life
+        return None if members.all() else members
+
+    def isomers(self):
+        """The `IsomerGrid` of the daughters that can pass."""
+        nuclides = Nuclides.data()
+        members = self.members(nuclides)
+        return nuclides.isomers if members is None else nuclides.isomer_subset(members)
+
+
+class Products:
+    """A batch of isomer products of a daughter family, as a matrix of
+    nuclide ids, one product to a row, padded on the right with -1, along
+    with the total mass excess of each row.
+    """
+
+    def __init__(self, ids):
+        nuclides = Nuclides.data()
+        present = ids >= 0
+        self.ids = ids
+        # Summed column by column, in the same order as `ReactionEnergy`.
+        self.mass_excess_kev = np.zeros(len(ids))
+        for column, mask in zip(ids.T, present.T):
+            self.mass_excess_kev += np.where(mask, nuclides.mass_excess_kev[column], 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class DaughterFamily:
+    """The isomer products of a set of daughter partitions.  Combinations
+    whose parents have the same totals share a daughter family, which is
+    expanded once for all of them.
+    """
+
+    # The number of isomer products handled at a time.
+    batch_size = 2 ** 16
+
+    def __init__(self, partitions, plan=None):
+        self.partitions = partitions
+        self.plan = plan or FilterPlan()
+
+    def batches(self, windows):
+        """Yield the isomer products of the daughters as `Products`, in the
+        order of `Combinations._reactions`, skipping the partitions that the
+        `FilterPlan` rejects and those whose total mass excess cannot fall
+        within any of the windows.  A window of None admits everything.
+        """
+        partitions = self.partitions
+        if not partitions:
+            return
+        grid = self.plan.isomers()
+        counts = np.diff(partitions.offsets)
+        candidates = np.flatnonzero(self.plan.allows_counts(counts))
+        if not len(candidates):
+            return
+        counts = counts[candidates]
+        rows = np.repeat(np.arange(len(candidates)), counts)
+        columns = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        width = int(counts.max())
+
+        # The grid cell of each daughter, or -1 past the end of a partition,
+        # and the number of isomers in the cell, or 1 past the end.
+        flat = grid.cells(partitions.numbers[partitions.offsets[candidates][rows] + columns])
+        inside = flat >= 0
+        cells = np.full((len(candidates), width), -1)
+        cells[rows, columns] = np.where(inside, flat, 0)
+        present = cells >= 0
+        sizes = np.where(present, grid.stop.ravel()[cells] - grid.start.ravel()[cells], 1)
+        sizes[rows[~inside], columns[~inside]] = 0
+
+        selected = sizes.all(axis=1)
+        if None not in windows:
+            lowest = np.where(present, grid.min_mass_excess.ravel()[cells], 0).sum(axis=1)
+            highest = np.where(present, grid.max_mass_excess.ravel()[cells], 0).sum(axis=1)
+            within = np.zeros(len(candidates), dtype=bool)
+            with np.errstate(invalid='ignore'):
+                for lower, upper in set(windows):
+                    within |= (highest >= lower) & (lowest < upper)
+            selected &= within
+        selected = np.flatnonzero(selected)
+
+        # Each partition expands into the product of its isomers, with the
+        # last daughter varying fastest, as with `itertools.product`.
+        products = sizes[selected].prod(axis=1)
+        strides = np.ones_like(sizes)
+        strides[:, :-1] = np.cumprod(sizes[:, :0:-1], axis=1)[:, ::-1]
+        ends = np.cumsum(products)
+        first = 0
+        while first < len(selected):
+            last = max(first + 1, int(np.searchsorted(
+                ends, ends[first] - products[first] + self.batch_size, side='right')))
+            chunk = selected[first:last]
+            counts = products[first:last]
+            index = np.repeat(chunk, counts)
+            local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            ids = np.full((len(index), width), -1)
+            for column in range(width):
+                cell = cells[index, column]
+                digit = local // strides[index, column] % sizes[index, column]
+                found = grid.ids[grid.start.ravel()[cell] + digit]
+                ids[:, column] = np.where(cell >= 0, found, -1)
+            yield Products(ids)
+            first = last
+
+
+class DaughterFamilies:
+    """Share the expansion of daughter families between the combinations of
+    a system.  The combinations with the same `family_key` are evaluated
+    together the first time any of them is asked for, and the ids of the
+    reactions that pass each one's filters are held until that combination's
+    reactions are asked for.
+    """
+
+    def __init__(self, combinations):
+        self._groups = {}
+        for combination in combinations:
+            key = combination.family_key()
+            if key is not None:
+                self._groups.setdefault(key, []).append(combination)
+        self._allowed = {}
+
+    def reactions(self, combination):
+        """Return an iterator over the reactions of a combination."""
+        group = self._groups.get(combination.family_key())
+        if not group or len(group) < 2:
+            return combination.reactions()
+        if id(combination) not in self._allowed:
+            self._evaluate(group)
+        parents, ids = self._allowed.pop(id(combination))
+        return itertools.chain.from_iterable(
+            combination.reactions_from_ids(parents, i) for i in ids)
+
+    def _evaluate(self, group):
+        parents = [c.parents() for c in group]
+        allowed = [[] for _ in group]
+        for products in group[0].daughter_family().batches([c.mass_excess_window() for c in group]):
+            for combination, _parents, ids in zip(group, parents, allowed):
+                ids.append(products.ids[combination.allowed_rows(_parents, products)])
+        for combination, _parents, ids in zip(group, parents, allowed):
+            self._allowed[id(combination)] = (_parents, ids)
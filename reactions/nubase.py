@@ -3,10 +3,18 @@ Provide a Python interface into the Nubase isotope data file.
 """
 # pylint: disable=too-many-instance-attributes, too-few-public-methods
 from __future__ import absolute_import
+import hashlib
+import itertools
+import json
+import logging
+import math
+import mmap
 import os
 import re
-import itertools
-from collections import defaultdict
+import struct
+import tempfile
+
+import numpy as np
 
 from .units import Energy, HalfLife
 from .constants import DALTON_KEV
@@ -18,6 +26,7 @@ NUBASE_PATH = os.path.abspath(os.path.join(BASEPATH, "../db/nubtab12.asc"))
 
 ALTERNATE_LABELS = {
     '1 n':    'n',
+    '1n':     'n',
     '1H':     'p',
     '2H':     'd',
     '3H':     't',
@@ -200,6 +209,33 @@ TRACE_ISOTOPES = {
 }
 
 
+# Decay modes tracked in the decay mode bitmask, in bit order, together with
+# the note that is included in the output for each of them.
+DECAY_MODES = (
+    ('A',    '→α'),
+    ('B-',   '→β-'),
+    ('B+',   '→β+'),
+    ('B+p',  '→β+p'),
+    ('B+A',  '→β+α'),
+    ('B-n',  '→β-n'),
+    ('B-2n', '→β-2n'),
+    ('B-3n', '→β-3n'),
+    ('B+SF', '→β+SF'),
+    ('B-SF', '→β-SF'),
+    ('B-A',  '→β-α'),
+    ('B-d',  '→β-d'),
+    ('n',    '→n'),
+    ('2n',   '→2n'),
+    ('p',    '→p'),
+    ('2p',   '→2p'),
+    ('EC',   '→ε'),
+    ('IT',   '→IT'),
+    ('SF',   '→SF'),
+)
+
+DECAY_MODE_BITS = {mode: 1 << i for i, (mode, _) in enumerate(DECAY_MODES)}
+
+
 class Electron:
     """Model an electron."""
 
@@ -213,6 +249,7 @@ class Electron:
         self.signature = (self.label, '0')
         self.notes = set()
         self.mass_excess_kev = 0
+        self.half_life_seconds = math.inf
         self.is_excited = False
         self.in_nature = True
         self.is_trace = False
@@ -235,6 +272,7 @@ class ElectronNeutrino:
         self.numbers = (0, 0)
         self.notes = set() #{'ν'}
         self.mass_excess_kev = 0.00023
+        self.half_life_seconds = math.inf
         self.is_excited = False
         self.in_nature = True
         self.is_trace = False
@@ -244,38 +282,305 @@ class ElectronNeutrino:
         return 'ElectronNeutrino'
 
 
+class GammaPhoton:
+    """Represent a gamma photon that results from a nuclear reaction."""
+
+    def __init__(self):
+        self.mass_number = 0
+        self.is_baryon = False
+        self.full_label = self.label = 'ɣ'
+        self.is_stable = False
+        self.is_excited = False
+        self.mass_excess_kev = 0
+        self.spin_and_parity = '1-'
+        self.numbers = (0, 0)
+        self.notes = frozenset({'ɣ'})
+
+
+# These particles carry no state of their own and are shared everywhere.
+ELECTRON = Electron()
+ELECTRON_NEUTRINO = ElectronNeutrino()
+GAMMA_PHOTON = GammaPhoton()
+
+
+class NubaseSnapshot:
+    """Read and write a compiled copy of the Nubase table.
+
+    The snapshot is written next to the ASCII table and holds fixed-width
+    arrays for each column, so that it can be memory-mapped on later loads
+    instead of being parsed again.  The snapshot is rebuilt whenever the
+    SHA1 of the source file changes or the format version is bumped.
+    """
+
+    version = 4
+    magic = b'NUBSNAP\0'
+    _header = struct.Struct('<8sII')
+    _alignment = 8
+
+    def __init__(self, source, edition='2012'):
+        self.source = source
+        self.edition = edition
+        self.path = source + '.snapshot'
+        with open(source, 'rb') as file:
+            self.source_hash = hashlib.sha1(file.read()).hexdigest()
+
+    def read(self):
+        """Return a dict of memory-mapped column arrays, or None if there is
+        no snapshot that is current with the source file.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, length, start = self._header.unpack_from(buffer)
+            if magic != self.magic:
+                return None
+            header = json.loads(buffer[self._header.size:self._header.size + length])
+        except (OSError, ValueError, struct.error):
+            return None
+        current = (self.version, self.source_hash, self.edition)
+        if (header.get('version'), header.get('source'), header.get('edition')) != current:
+            return None
+        columns = {}
+        for name, (dtype, shape, offset) in header['columns'].items():
+            count = int(np.prod(shape))
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=start + offset)
+            columns[name] = array.reshape(shape)
+        return columns
+
+    def write(self, columns):
+        """Atomically write the column arrays to the snapshot file.  Failure to
+        write the snapshot is not fatal; the table is parsed again next time.
+        """
+        layout, offset = {}, 0
+        for name, array in columns.items():
+            layout[name] = [array.dtype.str, list(array.shape), offset]
+            offset = self._align(offset + array.nbytes)
+        header = {
+            'version': self.version,
+            'source':  self.source_hash,
+            'edition': self.edition,
+            'columns': layout,
+        }
+        encoded = json.dumps(header).encode('utf-8')
+        start = self._align(self._header.size + len(encoded))
+        try:
+            directory = os.path.dirname(self.path)
+            with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+                file.write(self._header.pack(self.magic, len(encoded), start))
+                file.write(encoded.ljust(start - self._header.size, b' '))
+                for array in columns.values():
+                    data = np.ascontiguousarray(array).tobytes()
+                    file.write(data.ljust(self._align(len(data)), b'\0'))
+            os.chmod(file.name, 0o644)
+            os.replace(file.name, self.path)
+        except OSError as error:
+            logging.info('unable to write nubase snapshot: %s', error)
+
+    def _align(self, offset):
+        return -(-offset // self._alignment) * self._alignment
+
+
+def pack_strings(strings):
+    """Pack a list of strings, or of UTF-8 encoded bytes, into a byte array and
+    an array of offsets.
+    """
+    encoded = [s if isinstance(s, bytes) else s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def unpack_strings(blob, offsets):
+    """Return the list of strings held in a packed byte array."""
+    data, bounds = blob.tobytes(), offsets.tolist()
+    return [data[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])]
+
+
 class BadNubaseRow(RuntimeError):
     """Sentinel exception raised when a row in the Nubase file cannot be parsed."""
     pass
 
 
-def first_match(pattern, string):
-    """Return the first match of <pattern>"""
-    match = re.search(pattern, string)
-    if not match:
-        return None
-    return match.group()
+class NubaseEdition:
+    """Describe the fixed-width layout of the lines in a given edition of the
+    Nubase evaluation.
 
+    `columns` lists (field, start, end) for each raw field of a line, with an
+    end of None for a field that runs to the end of the line.  `values` gives
+    narrower (start, end) slices for fields holding a value followed by an
+    uncertainty, and `isomer` names a field holding an isomer suffix that is
+    appended to the nuclide label.
+    """
 
-class Nuclide:
-    """Model an individual nuclide that will participate in reactions."""
-
-    _columns = (
-        (4, 'massNumber'),
-        (7, 'atomicNumber'),
-        (9, 'atomicNumberExtra'),
-        (18, 'nuclide'),
-        (39, 'massExcess'),
-        (61, 'excitationEnergy'),
-        (69, 'halfLife'),
-        (71, 'halfLifeUnit'),
-        (79, 'unknown'),
-        (93, 'spinAndParity'),
-        (96, 'ensdfArchiveFileYear'),
-        (105, 'reference'),
-        (110, 'yearOfDiscovery'),
-        (-1, 'decayModesAndIntensities'),
-    )
+    def __init__(self, name, columns, **kwargs):
+        self.name = name
+        self.columns = columns
+        self.values = kwargs.get('values', {})
+        self.isomer = kwargs.get('isomer')
+        self.comment = kwargs.get('comment')
+        self._fields = {field: (start, end) for field, start, end in columns}
+
+    def span(self, field, value=False):
+        """The (start, end) columns of a field."""
+        if value and field in self.values:
+            return self.values[field]
+        return self._fields[field]
+
+    def row(self, line):
+        """Split a line from the Nubase file into its raw fields."""
+        row = {}
+        for field, start, end in self.columns:
+            text = line[start:end].strip()
+            if text:
+                row[field] = text
+        return row
+
+    def __repr__(self):
+        return 'NubaseEdition({})'.format(self.name)
+
+
+NUBASE2012_COLUMNS = (
+    ('massNumber', 0, 4),
+    ('atomicNumber', 4, 7),
+    ('atomicNumberExtra', 7, 9),
+    ('nuclide', 9, 18),
+    ('massExcess', 18, 39),
+    ('excitationEnergy', 39, 61),
+    ('halfLife', 61, 69),
+    ('halfLifeUnit', 69, 71),
+    ('unknown', 71, 79),
+    ('spinAndParity', 79, 93),
+    ('ensdfArchiveFileYear', 93, 96),
+    ('reference', 96, 105),
+    ('yearOfDiscovery', 105, 110),
+    ('decayModesAndIntensities', 110, None),
+)
+
+# NUBASE2016 kept the layout of NUBASE2012.  NUBASE2020 moved to separate
+# value and uncertainty columns, split the isomer suffix out of the nuclide
+# label and added a commented header.
+EDITIONS = {
+    '2012': NubaseEdition(
+        '2012',
+        NUBASE2012_COLUMNS,
+        values={'massExcess': (18, 29)},
+    ),
+    '2016': NubaseEdition(
+        '2016',
+        NUBASE2012_COLUMNS,
+        values={'massExcess': (18, 29)},
+    ),
+    '2020': NubaseEdition(
+        '2020',
+        (
+            ('massNumber', 0, 3),
+            ('atomicNumber', 4, 7),
+            ('atomicNumberExtra', 7, 8),
+            ('nuclide', 11, 16),
+            ('isomer', 16, 17),
+            ('massExcess', 18, 31),
+            ('massExcessUncertainty', 31, 42),
+            ('excitationEnergy', 42, 54),
+            ('excitationEnergyUncertainty', 54, 65),
+            ('excitationEnergyOrigin', 65, 67),
+            ('halfLife', 69, 78),
+            ('halfLifeUnit', 78, 80),
+            ('halfLifeUncertainty', 81, 88),
+            ('spinAndParity', 88, 102),
+            ('ensdfArchiveFileYear', 102, 104),
+            ('yearOfDiscovery', 114, 118),
+            ('decayModesAndIntensities', 119, None),
+        ),
+        isomer='isomer',
+        comment=b'#',
+    ),
+}
+
+
+class FixedWidthMatrix:
+    """Hold the lines of a fixed-width file as a (line, character) matrix of
+    bytes, padded with spaces, so that a column can be sliced out of every
+    line at once.
+    """
+
+    _space = ord(' ')
+
+    def __init__(self, buffer, comment=None):
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        ends = np.flatnonzero(data == ord('\n'))
+        if data.size and data[-1] != ord('\n'):
+            ends = np.append(ends, data.size)
+        starts = np.concatenate(([0], ends[:-1] + 1)).astype(np.int64)
+        lengths = ends - starts
+        keep = lengths > 0
+        if comment:
+            keep &= data[np.minimum(starts, max(data.size - 1, 0))] != ord(comment)
+        starts, lengths = starts[keep], lengths[keep]
+        width = int(lengths.max()) if lengths.size else 0
+        offsets = np.arange(width)
+        inside = offsets < lengths[:, None]
+        self.matrix = np.full((len(starts), width), self._space, dtype=np.uint8)
+        self.matrix[inside] = data[(starts[:, None] + offsets)[inside]]
+        self.matrix[self.matrix == ord('\r')] = self._space
+        self.lengths = lengths
+
+    def select(self, mask):
+        """Keep only the lines selected by a boolean mask."""
+        selected = self.__class__.__new__(self.__class__)
+        selected.matrix, selected.lengths = self.matrix[mask], self.lengths[mask]
+        return selected
+
+    def _slice(self, span):
+        start, end = span
+        width = self.matrix.shape[1]
+        end = width if end is None else end
+        block = np.full((len(self.matrix), max(end - start, 1)), self._space, dtype=np.uint8)
+        available = self.matrix[:, start:min(end, width)]
+        block[:, :available.shape[1]] = available
+        return block
+
+    def strings(self, span):
+        """Return a column as an array of stripped byte strings."""
+        block = self._slice(span)
+        return np.char.strip(block.view('S{}'.format(block.shape[1])).ravel())
+
+    def count_lowercase(self, span):
+        """Count the lowercase letters in a column."""
+        block = self._slice(span)
+        return ((block >= ord('a')) & (block <= ord('z'))).sum(axis=1)
+
+    def integers(self, span):
+        """Return a column of integers."""
+        return self.floats(span).astype(np.int64)
+
+    def floats(self, span, markers=b'#'):
+        """Return a column of numbers, with NaN wherever there is no number.
+        The first number in the column is used, ignoring any markers such as
+        '#' for estimated values.
+        """
+        block = self._slice(span)
+        block[np.isin(block, np.frombuffer(markers, dtype=np.uint8))] = self._space
+        values = np.char.strip(block.view('S{}'.format(block.shape[1])).ravel())
+        values = np.char.partition(values, b' ')[:, 0]
+        result = np.full(len(values), math.nan)
+        numeric = np.char.isdigit(np.char.replace(np.char.replace(values, b'.', b''), b'-', b''))
+        result[numeric] = values[numeric].astype(np.float64)
+        return result
+
+    def lines(self):
+        """Return each line as UTF-8 encoded bytes."""
+        return [row[:length].tobytes() for row, length in zip(self.matrix, self.lengths.tolist())]
+
+
+class NuclideTable:
+    """Hold the fields of a set of nuclides in contiguous NumPy arrays, indexed
+    by an integer nuclide id.
+    """
+
+    STABLE = 1
+    TRACE = 2
+    EXCITED = 4
 
     _not_excited = {
         '1 n',
@@ -319,110 +624,341 @@ class Nuclide:
         '79Ni',
     }
 
+    numeric_columns = {
+        'mass_number':        '<i2',
+        'atomic_number':      '<i2',
+        'mass_excess_kev':    '<f8',
+        'half_life_seconds':  '<f8',
+        'isotopic_abundance': '<f8',
+        'flags':              'u1',
+        'decay_modes':        '<u4',
+    }
+
+    string_columns = (
+        'initial_label',
+        'label',
+        'level',
+        'spin_and_parity',
+        'line',
+    )
+
     @classmethod
     def load(cls, **kwargs):
-        """Load the nuclide from a line in the Nubase file."""
-        line = kwargs['line']
-        row = {}
-        endcol_prev = 0
-        for endcol, field in cls._columns:
-            text = line[endcol_prev:endcol].strip()
-            if text:
-                row[field] = text
-            endcol_prev = endcol
-        return cls(row)
-
-    def __init__(self, row):
-        if not 'massExcess' in row:
-            raise BadNubaseRow('no mass excess: {}'.format(row))
-        self.row = row
-        self._initialize_basic_fields()
-        self._initialize_isotope_fields()
-        self._initialize_isomer_fields()
-        self._initialize_calculated_fields()
-
-    def _initialize_basic_fields(self):
-        self.initial_label = self.row['nuclide']
-        self.atomic_number = int(first_match(r'\d+', self.row['atomicNumber']))
-        self.is_baryon = True
-        self.mass_number = int(self.row['massNumber'])
-        self.neutron_number = self.mass_number - self.atomic_number
-        self.numbers = (self.mass_number, self.atomic_number)
-        self.spin_and_parity = None
-        if 'spinAndParity' in self.row:
-            self.spin_and_parity = ' '.join(self.row['spinAndParity'].split())
-
-    def _initialize_isotope_fields(self):
-        decays = self.row.get('decayModesAndIntensities', '')
+        """Load a table from a Nubase file, using a compiled snapshot of the
+        file if one is available.
+        """
+        path = kwargs['path']
+        edition = EDITIONS[kwargs.get('edition') or '2012']
+        snapshot = NubaseSnapshot(path, edition.name)
+        columns = snapshot.read()
+        if columns is not None:
+            return cls(columns, edition)
+        with open(path, 'rb') as file:
+            table = cls.parse_buffer(file.read(), edition)
+        snapshot.write(table.columns)
+        return table
+
+    @classmethod
+    def parse(cls, lines, edition=None):
+        """Parse lines from a Nubase file into a table, skipping those rows
+        that cannot be used.
+        """
+        return cls.parse_buffer(''.join(lines).encode('utf-8'), edition)
+
+    @classmethod
+    def parse_buffer(cls, buffer, edition=None):
+        """Parse the contents of a Nubase file into a table.  Each column is
+        sliced out of a (line, character) matrix of the whole file at once.
+        """
+        edition = edition or EDITIONS['2012']
+        matrix = FixedWidthMatrix(buffer, edition.comment)
+        mass_excess = matrix.floats(edition.span('massExcess', value=True))
+        matrix = matrix.select(~np.isnan(mass_excess))
+        mass_excess = mass_excess[~np.isnan(mass_excess)]
+
+        initial_labels = matrix.strings(edition.span('nuclide'))
+        if edition.isomer:
+            isomers = matrix.strings(edition.span(edition.isomer))
+            initial_labels = np.char.add(initial_labels, isomers)
+        initial_labels = [label.decode('utf-8') for label in initial_labels.tolist()]
+        lowercase = matrix.count_lowercase(edition.span('nuclide'))
+        if edition.isomer:
+            lowercase += matrix.count_lowercase(edition.span(edition.isomer))
+        decays = cls._decays(matrix.strings(edition.span('decayModesAndIntensities')))
+        is_excited = (decays['isotopic_abundance'] == 0) & \
+            ~np.isin(initial_labels, list(cls._not_excited)) & (lowercase > 1)
+        labels, levels = cls._labels(initial_labels, is_excited)
+        spins = np.unique(matrix.strings(edition.span('spinAndParity')), return_inverse=True)
+        spins = [' '.join(s.decode('utf-8').split()) for s in spins[0].tolist()], spins[1]
+
+        columns = {
+            'mass_number':        matrix.integers(edition.span('massNumber')),
+            'atomic_number':      matrix.integers(edition.span('atomicNumber')),
+            'mass_excess_kev':    mass_excess,
+            'half_life_seconds':  cls._half_life_seconds(matrix, edition),
+            'isotopic_abundance': decays['isotopic_abundance'],
+            'flags':              np.where(decays['is_stable'], cls.STABLE, 0) | \
+                                  np.where(np.isin(initial_labels, list(TRACE_ISOTOPES)),
+                                           cls.TRACE, 0) | \
+                                  np.where(is_excited, cls.EXCITED, 0),
+            'decay_modes':        decays['decay_modes'],
+        }
+        columns = {name: columns[name].astype(dtype) for name, dtype in cls.numeric_columns.items()}
+        columns['branching_ratios'] = decays['branching_ratios'].astype('<f4')
+        strings = {
+            'initial_label':   initial_labels,
+            'label':           labels,
+            'level':           levels,
+            'spin_and_parity': [spins[0][i] for i in spins[1].ravel()],
+            'line':            matrix.lines(),
+        }
+        for name in cls.string_columns:
+            columns[name], columns[name + '_offsets'] = pack_strings(strings[name])
+        return cls(columns, edition)
+
+    @classmethod
+    def _labels(cls, initial_labels, is_excited):
+        labels, levels = [], []
+        for label, excited in zip(initial_labels, is_excited.tolist()):
+            label, level = (label[:-1], label[-1]) if excited else (label, '0')
+            labels.append(ALTERNATE_LABELS.get(label, label))
+            levels.append(level)
+        return labels, levels
+
+    @classmethod
+    def _decays(cls, decays):
+        """Parse the decay modes and intensities once for each distinct value
+        of the column.
+        """
+        unique, inverse = np.unique(decays, return_inverse=True)
+        parsed = [cls._decay_fields(d.decode('utf-8')) for d in unique.tolist()]
+        inverse = inverse.ravel()
+        return {
+            'isotopic_abundance': np.array([p[0] for p in parsed], dtype=np.float64)[inverse],
+            'is_stable':          np.array([p[1] for p in parsed], dtype=bool)[inverse],
+            'decay_modes':        np.array([p[2] for p in parsed], dtype=np.int64)[inverse],
+            'branching_ratios':   np.array(
+                [p[3] for p in parsed], dtype=np.float64).reshape(-1, len(DECAY_MODES))[inverse],
+        }
+
+    @classmethod
+    def _decay_fields(cls, decays):
         matches = re.search(r'IS=([\d\.]+)', decays)
-        self.isotopic_abundance = float(matches.group(1)) if matches else 0.
-        self.is_stable = matches is not None
-        self.is_trace = self.initial_label in TRACE_ISOTOPES
-        self.in_nature = self.is_stable or self.is_trace
+        isotopic_abundance = float(matches.group(1)) if matches else 0.
+        return (
+            isotopic_abundance,
+            matches is not None,
+            cls._decay_modes(decays),
+            cls._branching_ratios(decays),
+        )
+
+    @classmethod
+    def _half_life_seconds(cls, matrix, edition):
+        values = matrix.strings(edition.span('halfLife'))
+        units = np.unique(matrix.strings(edition.span('halfLifeUnit')), return_inverse=True)
+        factors = np.array([
+            HalfLife.SECONDS_PER_UNIT.get(u.decode('utf-8'), math.nan) for u in units[0].tolist()
+        ])[units[1].ravel()]
+        seconds = matrix.floats(edition.span('halfLife'), markers=b'#<>~') * factors
+        return np.where(values == b'stbl', math.inf, seconds)
+
+    @classmethod
+    def _decay_modes(cls, decays):
+        mask = 0
+        for token in re.split(r'[;=~<]', decays):
+            mask |= DECAY_MODE_BITS.get(token, 0)
+        return mask
 
-    def _initialize_isomer_fields(self):
+    @classmethod
+    def _branching_ratios(cls, decays):
+        ratios = [math.nan] * len(DECAY_MODES)
+        for entry in decays.split(';'):
+            match = re.match(r'([^=~<>]+)[=~<>]+\s*([\d\.]+)', entry)
+            if match and match.group(1) in DECAY_MODE_BITS:
+                ratios[DECAY_MODE_BITS[match.group(1)].bit_length() - 1] = float(match.group(2))
+        return ratios
+
+    def __init__(self, columns, edition=None):
+        self.columns = columns
+        self.edition = edition or EDITIONS['2012']
+        self.mass_number = columns['mass_number']
+        self.atomic_number = columns['atomic_number']
+        self.mass_excess_kev = columns['mass_excess_kev']
+        self.half_life_seconds = columns['half_life_seconds']
+        self.isotopic_abundance = columns['isotopic_abundance']
+        self.flags = columns['flags']
+        self.decay_modes = columns['decay_modes']
+        self.branching_ratios = columns['branching_ratios']
+        # The Nubase lines are decoded one at a time by `line`.
+        self.initial_label = unpack_strings(columns['initial_label'],
+                                            columns['initial_label_offsets'])
+        self.label = unpack_strings(columns['label'], columns['label_offsets'])
+        self.level = unpack_strings(columns['level'], columns['level_offsets'])
+        self.spin_and_parity = unpack_strings(columns['spin_and_parity'],
+                                              columns['spin_and_parity_offsets'])
+        self.is_stable = (self.flags & self.STABLE) != 0
+        self.is_trace = (self.flags & self.TRACE) != 0
+        self.is_excited = (self.flags & self.EXCITED) != 0
+        self.in_nature = self.is_stable | self.is_trace
+        self._notes = {}
+
+    def decays_by(self, mode):
+        """Which nuclides have a given decay mode?"""
+        return (self.decay_modes & DECAY_MODE_BITS[mode]) != 0
+
+    def branching_ratio(self, mode):
+        """The intensity in percent of a given decay mode for each nuclide,
+        or NaN where it is not known.
+        """
+        return self.branching_ratios[:, DECAY_MODE_BITS[mode].bit_length() - 1]
+
+    def notes(self, index):
+        """The notes for the decay modes of a given nuclide."""
+        key = (int(self.decay_modes[index]), bool(self.is_trace[index]))
+        notes = self._notes.get(key)
+        if notes is None:
+            mask, is_trace = key
+            notes = {note for mode, note in DECAY_MODES if mask & DECAY_MODE_BITS[mode]}
+            if is_trace:
+                notes.add('trace')
+            notes = self._notes[key] = frozenset(notes)
+        return notes
+
+    def line(self, index):
+        """The line in the Nubase file for a given nuclide id."""
+        blob, offsets = self.columns['line'], self.columns['line_offsets']
+        return blob[offsets[index]:offsets[index + 1]].tobytes().decode('utf-8')
+
+    def __len__(self):
+        return len(self.mass_number)
+
+    def __getitem__(self, index):
+        return Nuclide(self, index)
+
+
+class Nuclide:
+    """Model an individual nuclide that will participate in reactions.  A
+    nuclide is a view onto a single row of a `NuclideTable`.
+    """
+
+    __slots__ = ('table', 'index')
+
+    is_baryon = True
+
+    @classmethod
+    def load(cls, **kwargs):
+        """Load the nuclide from a line in the Nubase file."""
+        table = NuclideTable.parse([kwargs['line']])
+        if not len(table):
+            raise BadNubaseRow('no mass excess: {}'.format(kwargs['line']))
+        return table[0]
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def row(self):
+        """The raw fields of the line in the Nubase file."""
+        return self.table.edition.row(self.table.line(self.index))
+
+    @property
+    def initial_label(self):
+        """The label used for the nuclide in the Nubase file."""
+        return self.table.initial_label[self.index]
+
+    @property
+    def label(self):
+        """The label of the nuclide, without any excitation level."""
+        return self.table.label[self.index]
+
+    @property
+    def full_label(self):
+        """The label of the nuclide, together with any excitation level."""
         if self.is_excited:
-            label, self._excitation_level = self.initial_label[:-1], self.initial_label[-1]
-            self.label = ALTERNATE_LABELS.get(label, label)
-            self.full_label = '{} ({})'.format(self.label, self._excitation_level)
-        else:
-            label, self._excitation_level = self.initial_label, '0'
-            self.label = ALTERNATE_LABELS.get(label, label)
-            self.full_label = self.label
-        self.signature = (self.label, self._excitation_level)
-
-    def _initialize_calculated_fields(self):
-        kev = first_match(r'[\d\.\-]+', self.row['massExcess'])
-        self.mass_excess_kev = float(kev)
-        self.mass = Energy.load(kev=self.mass_number * DALTON_KEV + self.mass_excess_kev)
-
-    _noteworthy = {
-        'A':    '→α',
-        'B-':   '→β-',
-        'B+':   '→β+',
-        'B+p':  '→β+p',
-        'B+A':  '→β+α',
-        'B-n':  '→β-n',
-        'B-2n': '→β-2n',
-        'B-3n': '→β-3n',
-        'B+SF': '→β+SF',
-        'B-SF': '→β-SF',
-        'B-A':  '→β-α',
-        'B-d':  '→β-d',
-        'n':    '→n',
-        '2n':   '→2n',
-        'p':    '→p',
-        '2p':   '→2p',
-        'EC':   '→ε',
-        'IT':   '→IT',
-        'SF':   '→SF',
-    }
+            return '{} ({})'.format(self.label, self.table.level[self.index])
+        return self.label
+
+    @property
+    def signature(self):
+        """The label and excitation level identifying this nuclide."""
+        return (self.table.label[self.index], self.table.level[self.index])
+
+    @property
+    def mass_number(self):
+        """The number of nucleons."""
+        return int(self.table.mass_number[self.index])
+
+    @property
+    def atomic_number(self):
+        """The number of protons."""
+        return int(self.table.atomic_number[self.index])
+
+    @property
+    def neutron_number(self):
+        """The number of neutrons."""
+        return self.mass_number - self.atomic_number
+
+    @property
+    def numbers(self):
+        """The mass number and atomic number."""
+        return (self.mass_number, self.atomic_number)
+
+    @property
+    def spin_and_parity(self):
+        """The spin and parity, if known."""
+        return self.table.spin_and_parity[self.index] or None
+
+    @property
+    def isotopic_abundance(self):
+        """The abundance in percent of a stable isotope."""
+        return float(self.table.isotopic_abundance[self.index])
+
+    @property
+    def is_stable(self):
+        """Is the nuclide stable?"""
+        return bool(self.table.is_stable[self.index])
+
+    @property
+    def is_trace(self):
+        """Is the nuclide found in trace amounts in nature?"""
+        return bool(self.table.is_trace[self.index])
+
+    @property
+    def in_nature(self):
+        """Is the nuclide found in nature?"""
+        return bool(self.table.in_nature[self.index])
+
+    @property
+    def mass_excess_kev(self):
+        """The mass excess in keV."""
+        return float(self.table.mass_excess_kev[self.index])
+
+    @property
+    def mass(self):
+        """The mass of the nuclide."""
+        return Energy.load(kev=self.mass_number * DALTON_KEV + self.mass_excess_kev)
 
     @property
     def notes(self):
         """Are there any notes to include with this isotope?"""
-        matches = re.split(r'[;=~<]', self.row.get('decayModesAndIntensities', ''))
-        notes = {self._noteworthy.get(token) for token in filter(None, matches)} - {None}
-        if self.is_trace:
-            notes.add('trace')
-        return notes
+        return set(self.table.notes(self.index))
 
     @property
     def is_excited(self):
         """Is the nuclide an isomer in an excited state?"""
-        if self.isotopic_abundance:
-            return False
-        if self.initial_label in self._not_excited:
-            return False
-        matches = re.findall('[a-z]', self.initial_label)
-        if len(matches) > 1:
-            return True
-        return False
+        return bool(self.table.is_excited[self.index])
 
     @property
     def half_life(self):
         """What is the half-life of this nuclide?"""
-        return HalfLife(self.row['halfLife'], self.row['halfLifeUnit'])
+        row = self.row
+        return HalfLife(row['halfLife'], row['halfLifeUnit'])
+
+    @property
+    def half_life_seconds(self):
+        """The half-life in seconds, or NaN if it is not known."""
+        return float(self.table.half_life_seconds[self.index])
 
     def json(self):
         """Return a JSON-serializable dict."""
@@ -448,7 +984,13 @@ class Nuclide:
 
 
 class Nuclides:
-    """Provide a database of nuclides by atomic number, mass number, etc."""
+    """Provide a database of nuclides by atomic number, mass number, etc.
+
+    Nuclides are identified by integer ids.  The ids of the nuclides in the
+    underlying `NuclideTable` are their row numbers, and the electron and
+    electron neutrino are appended after them.  Batch calculations can index
+    directly into the arrays held here using those ids.
+    """
 
     _nuclides = None
 
@@ -461,48 +1003,222 @@ class Nuclides:
 
     @classmethod
     def load(cls, **kwargs):
-        """Load the database of nuclides from a file."""
-        path = kwargs['path']
-        nuclides = []
-        with open(path) as file:
-            for line in file:
-                try:
-                    nuclide = Nuclide.load(line=line)
-                    nuclides.append(nuclide)
-                except BadNubaseRow:
-                    continue
-        nuclides.extend([Electron(), ElectronNeutrino()])
-        return cls(nuclides)
-
-    def __init__(self, nuclides):
-        self._nuclides = list(nuclides)
-        self._by_label = {}
-        self._by_signature = {}
-        self._by_atomic_number = defaultdict(list)
-        self.isomers = defaultdict(list)
-        self.trace = {}
-        self._index_nuclides()
-
-    def _index_nuclides(self):
-        for nuclide in self._nuclides:
-            self._by_label[nuclide.initial_label] = nuclide
-            self._by_signature[nuclide.signature] = nuclide
-            self._by_atomic_number[nuclide.atomic_number].append(nuclide)
-            self.isomers[nuclide.numbers].append(nuclide)
+        """Load the database of nuclides from a file.  The `edition` argument
+        selects the layout of the file, e.g., '2012' or '2020'.
+        """
+        return cls(NuclideTable.load(**kwargs))
+
+    def __init__(self, table):
+        self.table = table
+        leptons = [ELECTRON, ELECTRON_NEUTRINO]
+        self._nuclides = [Nuclide(table, i) for i in range(len(table))] + leptons
+        self.mass_numbers = np.append(table.mass_number, [n.mass_number for n in leptons])
+        self.atomic_numbers = np.append(
+            table.atomic_number, [n.atomic_number for n in leptons])
+        self.mass_excess_kev = np.append(
+            table.mass_excess_kev, [n.mass_excess_kev for n in leptons])
+        self.is_excited = np.append(table.is_excited, [n.is_excited for n in leptons])
+        self.is_stable = np.append(table.is_stable, [n.is_stable for n in leptons])
+        self.in_nature = np.append(table.in_nature, [n.in_nature for n in leptons])
+        self.half_life_seconds = np.append(
+            table.half_life_seconds, [n.half_life_seconds for n in leptons])
+        self._by_label = dict(zip(table.initial_label + [n.initial_label for n in leptons],
+                                  range(len(self._nuclides))))
+        self._by_signature = dict(zip(
+            zip(table.label, table.level), range(len(table))))
+        self._by_signature.update(
+            (n.signature, len(table) + i) for i, n in enumerate(leptons))
+        self._by_atomic_number = np.argsort(self.atomic_numbers, kind='stable')
+        self._lepton_atomic_numbers = [n.numbers[1] for n in leptons]
+        self.isomers = IsomerGrid(self, self._lepton_atomic_numbers)
+        self._lepton_ids = {id(n): len(table) + i for i, n in enumerate(leptons)}
+        self._isomer_subsets = {}
 
     def atomic_number(self, atomic_number):
         """What is the nuclide for this number?"""
-        return self._by_atomic_number[atomic_number]
+        ids = self._by_atomic_number
+        numbers = self.atomic_numbers[ids]
+        start = np.searchsorted(numbers, atomic_number, side='left')
+        stop = np.searchsorted(numbers, atomic_number, side='right')
+        return [self._nuclides[i] for i in ids[start:stop]]
+
+    def id_of(self, nuclide):
+        """Return the id of a nuclide or lepton held here."""
+        lepton_id = self._lepton_ids.get(id(nuclide))
+        return nuclide.index if lepton_id is None else lepton_id
+
+    def by_ids(self, ids):
+        """Return the nuclides for a sequence of ids."""
+        return [self._nuclides[i] for i in ids]
+
+    def isomer_subset(self, members):
+        """Return an `IsomerGrid` holding only the nuclides whose ids are set
+        in a boolean mask, memoized on the contents of the mask.
+        """
+        key = np.packbits(members).tobytes()
+        grid = self._isomer_subsets.get(key)
+        if grid is None:
+            grid = IsomerGrid(self, self._lepton_atomic_numbers, members)
+            self._isomer_subsets[key] = grid
+        return grid
 
     def get(self, signature):
         """Return a nuclide for a given signature."""
-        return self._by_signature.get(signature)
+        index = self._by_signature.get(signature)
+        return None if index is None else self._nuclides[index]
 
     def __iter__(self):
         return iter(self._nuclides)
 
+    def __len__(self):
+        return len(self._nuclides)
+
     def __getitem__(self, signature):
-        return self._by_signature[signature]
+        return self._nuclides[self._by_signature[signature]]
+
+
+class IsomerGrid:
+    """Dense index over mass number and atomic number.
+
+    `ids` holds the nuclide ids sorted by (A, Z), and `start` and `stop` map
+    each (A, Z) cell to the range of `ids` holding its isomers.  `present` is
+    a bitmap of the cells that have at least one isomer, and
+    `min_mass_excess` and `max_mass_excess` hold the range of the mass
+    excesses of the isomers in each cell.  Atomic numbers are offset by one
+    in the arrays so that the electron, indexed under (0, -1), has a cell.
+    A boolean mask of `members` over the nuclide ids leaves the others out
+    of the grid, which keeps the same shape and order.
+    """
+
+    _empty = ()
+
+    def __init__(self, nuclides, lepton_atomic_numbers, members=None):
+        mass_numbers = nuclides.mass_numbers.astype(np.int64)
+        atomic_numbers = nuclides.atomic_numbers.astype(np.int64)
+        # The electron has an atomic number of 0 but is indexed under -1.
+        atomic_numbers[len(nuclides.table):] = lepton_atomic_numbers
+        self.ids = np.lexsort((atomic_numbers, mass_numbers))
+        mass_numbers, columns = mass_numbers[self.ids], atomic_numbers[self.ids] + 1
+        self.shape = (int(mass_numbers.max()) + 1, int(columns.max()) + 1)
+        if members is not None:
+            kept = members[self.ids]
+            self.ids, mass_numbers, columns = self.ids[kept], mass_numbers[kept], columns[kept]
+        boundaries = np.flatnonzero(np.diff(mass_numbers * self.shape[1] + columns)) + 1
+        starts = np.concatenate(([0], boundaries))
+        stops = np.concatenate((boundaries, [len(self.ids)]))
+        cells = (mass_numbers[starts], columns[starts])
+        self.start = np.zeros(self.shape, dtype=np.int32)
+        self.stop = np.zeros(self.shape, dtype=np.int32)
+        self.start[cells], self.stop[cells] = starts, stops
+        self.present = self.stop > self.start
+        mass_excess = nuclides.mass_excess_kev[self.ids]
+        self.min_mass_excess = np.full(self.shape, np.nan)
+        self.max_mass_excess = np.full(self.shape, np.nan)
+        self.min_mass_excess[cells] = np.minimum.reduceat(mass_excess, starts)
+        self.max_mass_excess[cells] = np.maximum.reduceat(mass_excess, starts)
+        self._cells = [[self._empty] * self.shape[1] for _ in range(self.shape[0])]
+        self._mass_excess = [[None] * self.shape[1] for _ in range(self.shape[0])]
+        members = nuclides._nuclides
+        for start, stop, mass_number, column in zip(starts, stops, *cells):
+            self._cells[mass_number][column] = tuple(members[i] for i in self.ids[start:stop])
+            self._mass_excess[mass_number][column] = (
+                float(self.min_mass_excess[mass_number, column]),
+                float(self.max_mass_excess[mass_number, column]),
+            )
+
+    def _inside(self, mass_number, atomic_number):
+        return 0 <= mass_number < self.shape[0] and -1 <= atomic_number < self.shape[1] - 1
+
+    def __contains__(self, numbers):
+        mass_number, atomic_number = numbers
+        return self._inside(mass_number, atomic_number) and \
+            bool(self.present[mass_number, atomic_number + 1])
+
+    def range(self, numbers):
+        """The (start, stop) range of `ids` holding the isomers of a given
+        (A, Z) pair.
+        """
+        mass_number, atomic_number = numbers
+        if not self._inside(mass_number, atomic_number):
+            return 0, 0
+        column = atomic_number + 1
+        return int(self.start[mass_number, column]), int(self.stop[mass_number, column])
+
+    def __getitem__(self, numbers):
+        mass_number, atomic_number = numbers
+        if not self._inside(mass_number, atomic_number):
+            return self._empty
+        return self._cells[mass_number][atomic_number + 1]
+
+    def cells(self, numbers):
+        """Flat indexes into the grid arrays for an (n, 2) array of (A, Z)
+        pairs, with -1 for the pairs that fall outside of the grid.
+        """
+        numbers = np.asarray(numbers, dtype=np.int64).reshape(-1, 2)
+        mass_numbers, columns = numbers[:, 0], numbers[:, 1] + 1
+        inside = (mass_numbers >= 0) & (mass_numbers < self.shape[0]) & \
+            (columns >= 0) & (columns < self.shape[1])
+        return np.where(inside, mass_numbers * self.shape[1] + columns, -1)
+
+    def mass_excess_range(self, numbers):
+        """The (min, max) mass excess in keV of the isomers of a given (A, Z)
+        pair, or None if there are none.
+        """
+        mass_number, atomic_number = numbers
+        if not self._inside(mass_number, atomic_number):
+            return None
+        return self._mass_excess[mass_number][atomic_number + 1]
+
+
+def encode_reactions(reactions, nuclides):
+    """Encode the parents and daughters of a set of reactions as a flat int32
+    array, for sending between processes or spilling to disk.  Each reaction
+    is written as the number of parents, a (count, nuclide id) pair for each
+    of them, and then the same for the daughters.  Photons are left out,
+    since `Reaction` adds them back.
+    """
+    values = []
+    for reaction in reactions:
+        for side in (reaction.initial_lvalues, reaction.rvalues):
+            pairs = [(num, nuclides.id_of(n)) for num, n in side if n is not GAMMA_PHOTON]
+            values.append(len(pairs))
+            for pair in pairs:
+                values.extend(pair)
+    return np.array(values, dtype=np.int32)
+
+
+def encode_daughter_ids(lvalues, ids, nuclides):
+    """Encode a batch of reactions as with `encode_reactions`, straight
+    from the parents they share and a matrix of daughter ids, one reaction to
+    a row, padded on the right with -1, without building the reactions.
+    """
+    parents = [(num, nuclides.id_of(n)) for num, n in lvalues if n is not GAMMA_PHOTON]
+    head = [len(parents)] + [value for pair in parents for value in pair]
+    values = []
+    for row in ids.tolist():
+        daughters = [i for i in row if i >= 0]
+        values.extend(head)
+        values.append(len(daughters))
+        for i in daughters:
+            values.extend((1, i))
+    return np.array(values, dtype=np.int32)
+
+
+def decode_reactions(encoded, nuclides):
+    """Yield the (lvalues, rvalues) of the reactions in an array produced by
+    `encode_reactions`.
+    """
+    values = encoded.tolist()
+    members = nuclides.by_ids
+    position = 0
+    while position < len(values):
+        sides = []
+        for _ in range(2):
+            count = values[position]
+            pairs = values[position + 1:position + 1 + 2 * count]
+            position += 1 + 2 * count
+            sides.append(list(zip(pairs[::2], members(pairs[1::2]))))
+        yield sides
 
 
 def stable_nuclides(nuclides, unstable_parents):
@@ -513,7 +1229,10 @@ def stable_nuclides(nuclides, unstable_parents):
 
 
 def parse_spec(spec, **kwargs):
-    """Parse the reaction spec provided from the command line."""
+    """Parse the reaction spec provided from the command line.  Each
+    unordered set of parents is produced once, so that, e.g., `H+H` yields
+    (p, d) but not (d, p).
+    """
 
     unstable_parents = kwargs.get('unstable_parents')
     database = Nuclides.data()
@@ -541,4 +1260,27 @@ def parse_spec(spec, **kwargs):
         iterator = stable_nuclides(nuclides, unstable_parents)
         reactants.append(iterator)
 
-    return itertools.product(*reactants)
+    return unordered_product(reactants)
+
+
+def unordered_product(operands):
+    """The cartesian product of the operands, keeping only the first of the
+    tuples that hold the same members in a different order.
+    """
+    operands = [list(o) for o in operands]
+    if len(operands) > 1 and all(o == operands[0] for o in operands):
+        return itertools.combinations_with_replacement(operands[0], len(operands))
+    signatures = [{n.signature for _, n in o} for o in operands]
+    if not any(a & b for a, b in itertools.combinations(signatures, 2)):
+        return itertools.product(*operands)
+    return _first_seen(itertools.product(*operands))
+
+
+def _first_seen(product):
+    seen = set()
+    for reactants in product:
+        key = tuple(sorted(n.signature for _, n in reactants))
+        if key in seen:
+            continue
+        seen.add(key)
+        yield reactants
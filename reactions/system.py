@@ -3,10 +3,21 @@ Model a system of reactions specified by a reaction spec on the
 command line.
 """
 # pylint: disable=too-few-public-methods, invalid-name
-from .nubase import parse_spec
-from .combinations import Combinations
-from .calculations import Decay
-from .views import SystemTerminalView
+import logging
+import multiprocessing
+
+import numpy as np
+
+from .nubase import (
+    Nuclides,
+    decode_reactions,
+    encode_daughter_ids,
+    encode_reactions,
+    parse_spec,
+)
+from .combinations import Combinations, DaughterFamilies
+from .calculations import Decay, GamowSweep
+from .views import SystemRecordView, SystemTerminalView
 
 
 class System:
@@ -27,14 +38,47 @@ class System:
         self.combinations = list(combinations)
         self._kwargs = kwargs
 
-    def reactions(self):
+    def reactions(self, jobs=None):
         """Returns the various nuclear reactions that can result from the
-        given parent nuclides, or that satisfy the input arguments.
+        given parent nuclides, or that satisfy the input arguments.  The
+        combinations whose parents have the same totals share the work of
+        expanding their daughters.  With more than one job, the combinations
+        are spread across a pool of worker processes, and the reactions come
+        back in the same order as they would in a single process.
         """
+        jobs = jobs or self._kwargs.get('jobs') or 1
+        if jobs > 1 and len(self.combinations) > 1:
+            yield from self._parallel_reactions(jobs)
+            return
+        families = DaughterFamilies(self.combinations)
         for combination in self.combinations:
-            for reaction in combination.reactions():
+            for reaction in families.reactions(combination):
                 yield combination, reaction
 
+    def _parallel_reactions(self, jobs):
+        global _system  # pylint: disable=global-statement
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            logging.warning('process pools need fork(); running in a single process')
+            yield from self.reactions(jobs=1)
+            return
+        # Load the nuclides before forking so that the workers share them.
+        nuclides = Nuclides.data()
+        _system = self
+        try:
+            with context.Pool(jobs) as pool:
+                indexes = range(len(self.combinations))
+                for index, encoded in zip(indexes, pool.imap(_encoded_reactions, indexes)):
+                    combination = self.combinations[index]
+                    reactions = [combination.reaction(lvalues, rvalues)
+                                 for lvalues, rvalues in decode_reactions(encoded, nuclides)]
+                    combination.load_gamow_values(reactions)
+                    for reaction in reactions:
+                        yield combination, reaction
+        finally:
+            _system = None
+
     def hyperphysics(self, **kwargs):
         """Carry out a set of decay calculations described in a Hyperphysics
         model.
@@ -45,9 +89,39 @@ class System:
         """Cary out a set of decay calculations described by Hermes."""
         return self._decay().hermes(**kwargs)
 
+    def gamow_sweep(self, screenings, r0=None):
+        """Compute the Gamow suppression factors of the two-body reactions for
+        each of a range of screening values, and each of several values of
+        r0 if given, enumerating the reactions once.
+        """
+        return GamowSweep.load(reactions=self.reactions(), screenings=screenings, r0=r0)
+
     def to_terminal(self, io, **kwargs):
         """Print the system to the provided io object."""
         SystemTerminalView(self, io, **kwargs).call()
 
+    def to_records(self, io, **kwargs):
+        """Stream the reactions to the provided io object as NDJSON or CSV
+        records, in the order in which they are produced.
+        """
+        SystemRecordView(self, io, **kwargs).call()
+
     def _decay(self):
         return Decay.load(reactions=self.reactions())
+
+
+# The system whose combinations are being worked on by a pool of processes.
+_system = None
+
+
+def _encoded_reactions(index):
+    # The Gamow factors are left to the parent process, which computes them
+    # for each batch of decoded reactions in one pass.
+    combination = _system.combinations[index]
+    nuclides = Nuclides.data()
+    if not combination.from_daughter_ids:
+        return encode_reactions(combination.reactions(), nuclides)
+    parents = combination.parents()
+    batches = [encode_daughter_ids(parents, ids, nuclides)
+               for ids in combination.daughter_ids(parents)]
+    return np.concatenate(batches) if batches else np.array([], dtype=np.int32)
@@ -4,13 +4,17 @@ be printed to a terminal.
 """
 # pylint: disable=no-self-use, too-few-public-methods, too-many-instance-attributes
 # pylint: disable=no-member
+import heapq
+from operator import itemgetter
+import pickle
 import re
+import tempfile
 from collections import defaultdict
 
-from .studies import Studies
-
+import numpy as np
 
-STUDIES = Studies.data()
+from .nubase import Nuclides, decode_reactions, encode_reactions
+from .studies import Studies
 
 
 class Options:
@@ -24,6 +28,8 @@ class Options:
         self.gamow = kwargs.get('gamow')
         self.ascii = kwargs.get('ascii', False)
         self.notes = not self.simple
+        self.limit = kwargs.get('limit')
+        self.max_memory = kwargs.get('max_memory')
 
 
 class TerminalView:
@@ -36,9 +42,18 @@ class TerminalView:
 
     _kwargs = {'selective': True}
 
-    def reactions(self, cls):
-        """Return a sorted list consisting of one line per reaction in the system."""
+    def reactions(self, cls, limit=None, max_memory=None):
+        """Return a sorted list consisting of one line per reaction in the system.
+        With a limit, only the first `limit` lines are kept, using a bounded
+        heap rather than sorting all of them.  With a memory budget in bytes,
+        the lines are sorted on disk and an iterator over them is returned.
+        """
         reactions = (cls(c, r, **self._kwargs) for c, r in self._system.reactions())
+        if limit is not None:
+            return heapq.nlargest(limit, self._filter(reactions), key=lambda l: l.sort_key)
+        if max_memory is not None:
+            return ExternalSort(self._system, max_memory).sorted(
+                self._filter(reactions), cls, **self._kwargs)
         return sorted(self._filter(reactions), key=lambda l: l.sort_key, reverse=True)
 
     def _filter(self, reactions):
@@ -51,15 +66,21 @@ class TerminalView:
         """Return all of the lies to be printed out to the terminal, together with references
         if any.
         """
+        return list(self.iter_lines(options))
+
+    def iter_lines(self, options):
+        """Yield the lines to be printed out to the terminal one at a time,
+        followed by the references, if any.
+        """
         refs = set()
-        lines = []
-        for reaction in self.reactions(self._line_class(options)):
+        lines = self.reactions(self._line_class(options), options.limit, options.max_memory)
+        for reaction in lines:
             line, _refs = reaction.terminal(options)
-            lines.append(line)
+            yield line
             refs |= set(_refs)
         if refs and options.references:
-            lines.extend([''] + sorted(refs))
-        return lines
+            yield ''
+            yield from sorted(refs)
 
 
 class StudiesTerminalView(TerminalView):
@@ -82,8 +103,71 @@ class StudiesTerminalView(TerminalView):
             yield reaction
 
 
+class ExternalSort:
+    """Sort the lines for a system within a memory budget.  Each line is
+    reduced to a compact record of its sort key, the index of its set of
+    combinations and its encoded reaction.  Sorted runs of records are
+    spilled to temporary files whenever the budget is reached, and the runs
+    are merged as the lines are rendered.  Lines come out in the same order
+    as with `sorted`.
+    """
+
+    # A rough size in memory of a record, used to decide when to spill.
+    record_bytes = 256
+    # The largest number of runs merged at once.  Past this, the runs so far
+    # are merged into one, to keep the number of open files down.
+    fan_in = 128
+
+    def __init__(self, system, max_memory):
+        self.system = system
+        self.run_length = max(1, int(max_memory) // self.record_bytes)
+        self._indexes = {id(c): i for i, c in enumerate(system.combinations)}
+
+    def sorted(self, lines, cls, **kwargs):
+        """Yield the lines in descending order of their sort keys."""
+        nuclides = Nuclides.data()
+        runs, run = [], []
+        for line in lines:
+            encoded = encode_reactions([line.reaction], nuclides).tobytes()
+            run.append((line.sort_key, self._indexes[id(line.combinations)], encoded))
+            if len(run) >= self.run_length:
+                run.sort(key=itemgetter(0), reverse=True)
+                runs.append(self._spill(run))
+                run = []
+            if len(runs) >= self.fan_in:
+                runs = [self._spill(self._merge(runs))]
+        run.sort(key=itemgetter(0), reverse=True)
+        for _, index, encoded in self._merge(runs, run):
+            combinations = self.system.combinations[index]
+            encoded = np.frombuffer(encoded, dtype=np.int32)
+            (lvalues, rvalues), = decode_reactions(encoded, nuclides)
+            yield cls(combinations, combinations.reaction(lvalues, rvalues), **kwargs)
+
+    def _merge(self, files, *runs):
+        readers = [self._read(f) for f in files]
+        return heapq.merge(*readers, *runs, key=itemgetter(0), reverse=True)
+
+    def _spill(self, records):
+        file = tempfile.TemporaryFile()
+        for record in records:
+            pickle.dump(record, file, pickle.HIGHEST_PROTOCOL)
+        file.seek(0)
+        return file
+
+    def _read(self, file):
+        with file:
+            while True:
+                try:
+                    yield pickle.load(file)
+                except EOFError:
+                    return
+
+
 class TerminalLine:
-    """Abstract base class representing a single line of terminal output."""
+    """Abstract base class representing a single line of terminal output.
+    Only the sort key is computed up front; the notes and the study
+    references are looked up the first time they are needed.
+    """
 
     _notes_template = '{:<55} {:<25}'
 
@@ -92,16 +176,45 @@ class TerminalLine:
         self.reaction = reaction
         self.sort_key = combinations.sort_key(reaction)
         self.q_value_kev = reaction.q_value.kev
-        self.notes = [self.format(s) for s in reaction.notes]
         self._lvalues = reaction.lvalues
         self._rvalues = reaction.rvalues
-        self.references = []
-        self.marks = []
-        self.agreements = []
-        self._add_references(self._lvalues, 'decrease', **kwargs)
-        self._add_references(self._rvalues, 'increase')
-        # Cases where a daughter was found in a study
-        self.agreement = sum(self.agreements) if self.agreements else None
+        self._kwargs = kwargs
+        self._references = None
+
+    @property
+    def notes(self):
+        """The notes for the reaction, formatted for this line."""
+        return [self.format(s) for s in self.reaction.notes]
+
+    @property
+    def references(self):
+        """References to the studies that mention the nuclides in the reaction."""
+        return self._studies()[0]
+
+    @property
+    def marks(self):
+        """Marks showing whether each study agrees with the reaction."""
+        return self._studies()[1]
+
+    @property
+    def agreements(self):
+        """1 for each study that agrees with the reaction, -1 for each that
+        does not.
+        """
+        return self._studies()[2]
+
+    @property
+    def agreement(self):
+        """Cases where a daughter was found in a study."""
+        agreements = self.agreements
+        return sum(agreements) if agreements else None
+
+    def _studies(self):
+        if self._references is None:
+            self._references = [], [], []
+            self._add_references(self._lvalues, 'decrease', **self._kwargs)
+            self._add_references(self._rvalues, 'increase')
+        return self._references
 
     def _spin_and_parity(self, string, values):
         spins_and_parities = (n.spin_and_parity for num, n in sorted(values, key=self._sort_key))
@@ -111,13 +224,14 @@ class TerminalLine:
 
     def _add_references(self, values, expected, **kwargs):
         selective = kwargs.get('selective')
-        for result in STUDIES.isotopes(n.label for num, n in values):
+        references, marks, agreements = self._references
+        for result in Studies.data().isotopes(n.label for num, n in values):
             agreement, mark = result.reference_mark(expected)
-            self.agreements.append(1 if agreement else -1)
+            agreements.append(1 if agreement else -1)
             if selective and agreement:
                 continue
-            self.marks.append(mark)
-            self.references.append(result.reference_line)
+            marks.append(mark)
+            references.append(result.reference_line)
 
     def _add_marks(self, string):
         string += '   {}'.format(', '.join(self._format_mark(m) for m in self.marks))
@@ -165,8 +279,9 @@ class TerminalLine:
         if options.spins:
             string = self._spin_and_parity(string, self._lvalues)
             string = self._spin_and_parity(string, self._rvalues)
-        if options.references:
-            string = self._add_marks(string)
+        if not options.references:
+            return string.strip(), []
+        string = self._add_marks(string)
         return string.strip(), self.references
 
 
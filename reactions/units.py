@@ -58,6 +58,30 @@ class Distance:
 class HalfLife:
     """Model the half-life of a radionuclide."""
 
+    SECONDS_PER_UNIT = {
+        'ys': 1e-24,
+        'zs': 1e-21,
+        'as': 1e-18,
+        'fs': 1e-15,
+        'ps': 1e-12,
+        'ns': 1e-9,
+        'us': 1e-6,
+        'ms': 0.001,
+        's':  1,
+        'm':  60,
+        'h':  3600,
+        'd':  86400,
+        'y':  3.154e+7,
+        'ky': 3.154e+10,
+        'My': 3.154e+13,
+        'Gy': 3.154e+16,
+        'Ty': 3.154e+19,
+        'Py': 3.154e+22,
+        'Ey': 3.154e+25,
+        'Zy': 3.154e+28,
+        'Yy': 3.154e+31,
+    }
+
     def __init__(self, value, unit):
         self.value = value
         self.unit = unit
@@ -67,19 +91,13 @@ class HalfLife:
         """Convert the half-life to seconds."""
         if math.inf == self.value:
             return self.value
-        if self.unit == 'ms':
-            return 0.001 * float(self.value)
-        if self.unit == 's':
-            return float(self.value)
-        if self.unit == 'd':
-            return 86400 * float(self.value)
-        if self.unit == 'y':
-            return 3.154e+7 * float(self.value)
-        if self.unit == 'ky':
-            return 3.154e+10 * float(self.value)
-        if self.unit == 'Py':
-            return 3.154e+23 * float(self.value)
-        raise ValueError('do not know how to convert unit: {}'.format(self.unit))
+        if self.value == 'stbl':
+            return math.inf
+        if self.unit not in self.SECONDS_PER_UNIT:
+            raise ValueError('do not know how to convert unit: {}'.format(self.unit))
+        # Estimated values and limits are marked with '#', '<', '>' and '~'.
+        value = float(str(self.value).strip('#<>~'))
+        return self.SECONDS_PER_UNIT[self.unit] * value
 
     def __str__(self):
         return '{} {}'.format(self.value, self.unit)
@@ -4,8 +4,13 @@ readable way.
 """
 #pylint: disable=invalid-name, too-few-public-methods
 
-import pandas as pd
+import csv
+import json
+import math
 
+import numpy as np
+
+from . import load_pandas
 from .terminal import TerminalView, StudiesTerminalView, Options
 
 
@@ -24,11 +29,13 @@ class DecayTerminalView:
         self.io.write('')
         self.io.write('At second:      {}'.format(self.kwargs.get('seconds')))
         self.io.write('Starting moles: {}'.format(self.kwargs.get('moles')))
-        self.io.write('Activity:       {:.2e}'.format(self.scenario.activity()))
-        self.io.write('Watts:          {:.2e}'.format(self.scenario.power().watts))
+        if self.scenario.r0s is not None:
+            self.io.write('r0 (fm):        {}'.format(', '.join(map(str, self.scenario.r0s))))
+        self.io.write('Activity:       {}'.format(_exponents(self.scenario.activity())))
+        self.io.write('Watts:          {}'.format(_exponents(self.scenario.power().watts)))
         self.io.write('')
 
-        df = self.scenario.df[[
+        columns = self.scenario.columns([
             'parent',
             'daughters',
             'parent_fraction',
@@ -38,17 +45,25 @@ class DecayTerminalView:
             'partial_half_life',
             'partial_activity',
             'watts',
-        ]]
+        ])
+        df = self.scenario.df[columns]
 
         if df.empty:
             self.io.write('No active isotopes.')
         else:
-            with pd.option_context('display.max_rows', 999, 'display.max_columns', 10):
-                df = df.dropna().sort_values(['watts', 'gamow_factor'], ascending=[0, 1])
+            pd = load_pandas()
+            with pd.option_context('display.max_rows', 999,
+                                   'display.max_columns', max(10, len(columns))):
+                order = [self.scenario.columns([c])[0] for c in ('watts', 'gamow_factor')]
+                df = df.dropna().sort_values(order, ascending=[0, 1])
                 self.io.write(df.to_string() + '\n')
         self.io.write('')
 
 
+def _exponents(values):
+    return ', '.join('{:.2e}'.format(v) for v in np.atleast_1d(values))
+
+
 class SystemTerminalView:
     """Print out a system of reactions to a terminal."""
 
@@ -60,7 +75,7 @@ class SystemTerminalView:
     def call(self):
         """Print to the io object."""
         options = Options(**self.kwargs)
-        for line in self._view_cls(self.system).lines(options):
+        for line in self._view_cls(self.system).iter_lines(options):
             self.io.write(line + '\n')
 
     @property
@@ -68,3 +83,72 @@ class SystemTerminalView:
         if self.kwargs.get('view') == 'studies' or self.kwargs.get('studies'):
             return StudiesTerminalView
         return TerminalView
+
+
+class SystemRecordView:
+    """Stream the reactions of a system to an io object, one record to a
+    reaction, in the order in which they are produced.  Nothing is sorted or
+    formatted for a terminal, and the output is flushed every `flush_every`
+    records, so that the first record is written right away and memory use
+    does not grow with the number of reactions.  The `format` option is
+    either 'ndjson' or 'csv'.
+    """
+
+    formats = ('ndjson', 'csv')
+    fields = ['parents', 'daughters', 'q_value_kev', 'gamow', 'notes', 'model']
+    flush_every = 1024
+
+    def __init__(self, system, io, **kwargs):
+        self.system = system
+        self.io = io
+        self.kwargs = kwargs
+        self.format = kwargs.get('format') or 'ndjson'
+        if self.format not in self.formats:
+            raise ValueError('unknown format: {}'.format(self.format))
+
+    def call(self):
+        """Write the records to the io object."""
+        write = self._csv_writer() if self.format == 'csv' else self._write_json
+        for count, (combination, reaction) in enumerate(self.system.reactions(), 1):
+            write(self.record(combination, reaction))
+            if count == 1 or count % self.flush_every == 0:
+                self.io.flush()
+        self.io.flush()
+
+    @staticmethod
+    def record(combination, reaction):
+        """A dict holding the fields of a single reaction.  A missing or
+        non-finite number, e.g., the NaN Gamow factor of a reaction with a
+        Q-value that is not positive, is given as None.
+        """
+        gamow = reaction.gamow_value
+        return {
+            'parents':     _labels(reaction.lvalues),
+            'daughters':   _labels(reaction.rvalues),
+            'q_value_kev': _finite(reaction.q_value.kev),
+            'gamow':       None if gamow == -1 else _finite(gamow),
+            'notes':       sorted(reaction.notes),
+            'model':       combination.model_name,
+        }
+
+    def _write_json(self, record):
+        self.io.write(json.dumps(record, ensure_ascii=False, allow_nan=False) + '\n')
+
+    def _csv_writer(self):
+        writer = csv.DictWriter(self.io, self.fields, lineterminator='\n')
+        writer.writeheader()
+
+        def write(record):
+            record['parents'] = ' + '.join(record['parents'])
+            record['daughters'] = ' + '.join(record['daughters'])
+            record['notes'] = ', '.join(record['notes'])
+            writer.writerow(record)
+        return write
+
+
+def _finite(value):
+    return value if math.isfinite(value) else None
+
+
+def _labels(values):
+    return [n.full_label for num, n in values for _ in range(num)]
@@ -1,32 +1,131 @@
 # pylint: disable=missing-docstring, wrong-import-position
 import argparse
+import math
 import sys
 import os
 
+import numpy as np
+
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from reactions.combinations import CalculateCombinations
 from reactions.system import System
 
 
 class App:
     def __init__(self, **kwargs):
+        # A range of screening values, or several values of r0, are swept
+        # after the reactions have been enumerated once.
+        self.screenings = self.r0s = self.times = None
+        if isinstance(kwargs.get('screening'), list):
+            self.screenings = kwargs['screening']
+            kwargs['screening'] = 0
+        if isinstance(kwargs.get('r0'), list):
+            self.r0s = kwargs['r0']
+            kwargs['r0'] = None
+        if isinstance(kwargs.get('seconds'), list):
+            self.times = kwargs['seconds']
+            kwargs['seconds'] = self.times[0]
         self.kwargs = kwargs
+        CalculateCombinations.store.max_bytes = int(kwargs['cache_size'] * 2 ** 20)
+        CalculateCombinations.memory.max_bytes = int(kwargs['memory_cache_size'] * 2 ** 20)
         self.system = System.load(self.kwargs['system_spec'], **self.kwargs)
 
     def call(self):
         if self.kwargs.get('decay_power'):
             self.print_decay_power()
             return
+        if self.screenings is not None or self.r0s is not None:
+            self.print_gamow_sweep()
+            return
         self.print_possible_reactions()
 
     def print_decay_power(self):
-        scenario = self.system.hyperphysics(**self.kwargs)
-        if self.kwargs.get('format') == 'csv':
+        kwargs = self.kwargs if self.r0s is None else dict(self.kwargs, r0=self.r0s)
+        scenario = self.system.hyperphysics(**kwargs)
+        if self.times is not None:
+            df = scenario.timeseries(self.times)
+            if self.kwargs.get('format') == 'csv':
+                df.to_csv(sys.stdout, index=False)
+            elif df.empty:
+                print('No active isotopes.')
+            else:
+                columns = scenario.columns(['partial_activity', 'watts'])
+                print(df.groupby('seconds')[columns].sum().to_string())
+        elif self.screenings is not None:
+            df = scenario.sweep(self.screenings)
+            if self.kwargs.get('format') == 'csv':
+                df.to_csv(sys.stdout, index=False)
+            else:
+                columns = scenario.columns(['partial_activity', 'watts'])
+                print(df.groupby('screening')[columns].sum().to_string())
+        elif self.kwargs.get('format') == 'csv':
             scenario.to_csv(sys.stdout)
         else:
             scenario.to_terminal(sys.stdout)
 
+    def print_gamow_sweep(self):
+        screenings = self.screenings or [self.kwargs.get('screening') or 0]
+        sweep = self.system.gamow_sweep(screenings, r0=self.r0s)
+        if self.kwargs.get('format') == 'csv':
+            sweep.to_csv(sys.stdout)
+        else:
+            print(sweep.to_string())
+
     def print_possible_reactions(self):
-        self.system.to_terminal(sys.stdout, **self.kwargs)
+        if self.kwargs.get('format') in ('ndjson', 'csv'):
+            self.system.to_records(sys.stdout, **self.kwargs)
+        else:
+            self.system.to_terminal(sys.stdout, **self.kwargs)
+
+
+def size(string):
+    """Parse a size in bytes such as 512M or 2G."""
+    units = {'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30, 'T': 2 ** 40}
+    string = string.strip().upper().rstrip('B')
+    if string and string[-1] in units:
+        return int(float(string[:-1]) * units[string[-1]])
+    return int(string)
+
+
+def number_range(string):
+    """Parse a number, or an inclusive range of numbers such as 0:20:0.5
+    written as start:stop:step.
+    """
+    if ':' not in string:
+        return float(string)
+    start, stop, step = (float(s) for s in string.split(':'))
+    if step <= 0:
+        raise argparse.ArgumentTypeError('the step must be positive: {}'.format(string))
+    if stop < start:
+        raise argparse.ArgumentTypeError('the range is empty: {}'.format(string))
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [start + i * step for i in range(count)]
+
+
+def time_grid(string):
+    """Parse a number of seconds, or a grid of times written as
+    start:stop:num, with a trailing :log for log-spaced times.
+    """
+    if ':' not in string:
+        return float(string)
+    parts = string.split(':')
+    spacing = parts.pop() if parts[-1] == 'log' else 'linear'
+    try:
+        start, stop, num = float(parts[0]), float(parts[1]), int(parts[2])
+    except (IndexError, ValueError):
+        raise argparse.ArgumentTypeError(
+            'expected start:stop:num[:log]: {}'.format(string)) from None
+    if num < 1 or len(parts) > 3 or (spacing == 'log' and min(start, stop) <= 0):
+        raise argparse.ArgumentTypeError('not a valid grid of times: {}'.format(string))
+    if spacing == 'log':
+        return np.geomspace(start, stop, num).tolist()
+    return np.linspace(start, stop, num).tolist()
+
+
+def numbers(string):
+    """Parse a number, or several numbers separated by commas."""
+    values = [float(s) for s in string.split(',')]
+    return values[0] if len(values) == 1 else values
 
 
 def parse_arguments():
@@ -46,21 +145,46 @@ def parse_arguments():
     parser.add_argument('--simple', dest='simple', action='store_true')
     parser.add_argument('--gamow', dest='gamow', action='store_true')
     parser.add_argument('--decay-power', dest='decay_power', action='store_true')
-    parser.add_argument('--screening', dest='screening', type=float)
+    parser.add_argument('--screening', dest='screening', type=number_range,
+                        help='a screening value, or a range to sweep, e.g., 0:20:0.5')
+    parser.add_argument('--r0', dest='r0', type=numbers,
+                        help='the nuclear radius constant in fm, or several, e.g., 1.1,1.2,1.25')
     parser.add_argument('--moles', dest='moles', type=float)
-    parser.add_argument('--seconds', dest='seconds', type=float)
+    parser.add_argument('--seconds', dest='seconds', type=time_grid,
+                        help='a number of seconds, or a grid of times, e.g., 1:1e9:1000:log')
     parser.add_argument('--active-fraction', dest='active_fraction', type=float)
-    parser.add_argument('--format', dest='format')
+    parser.add_argument('--format', dest='format',
+                        help='ndjson or csv to stream the reactions as records')
     parser.add_argument('--daughter-count', dest='daughter_count')
+    parser.add_argument('--stable-daughters', dest='stable_daughters', action='store_true',
+                        help='only allow daughters that are stable')
+    parser.add_argument('--min-half-life', dest='min_half_life', type=float,
+                        help='only allow daughters with a half-life of at least this many seconds')
+    parser.add_argument('--limit', dest='limit', type=int,
+                        help='print only the first LIMIT reactions')
+    parser.add_argument('--max-memory', dest='max_memory', type=size,
+                        help='sort the output on disk within this budget, e.g., 2G')
+    parser.add_argument('--jobs', dest='jobs', type=int,
+                        help='number of processes to spread the combinations across')
+    parser.add_argument('--cache-size', dest='cache_size', type=float,
+                        help='size of the combination cache in MiB')
+    parser.add_argument('--memory-cache-size', dest='memory_cache_size', type=float,
+                        help='size of the in-process combination cache in MiB')
     parser.set_defaults(
         active_fraction=1,
         ascii=False,
+        cache_size=1024,
         daughter_count='',
         decay_power=False,
         excited=False,
         format=None,
         gamow=False,
+        jobs=1,
+        limit=None,
         lower_bound=0,
+        max_memory=None,
+        memory_cache_size=256,
+        min_half_life=None,
         model='standard',
         moles=1,
         parent_ub=1000,
@@ -69,6 +193,7 @@ def parse_arguments():
         seconds=1,
         simple=False,
         spins=False,
+        stable_daughters=False,
         unstable_parents=False,
         upper_bound=500000,
         view='default',
@@ -82,3 +207,6 @@ if __name__ == '__main__':
         App(**vars(ARGS)).call()
     except KeyboardInterrupt:
         print('command canceled.')
+    except BrokenPipeError:
+        # The reader went away, e.g., `| head`; don't complain on exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
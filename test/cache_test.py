@@ -0,0 +1,174 @@
+# pylint: disable=missing-docstring, invalid-name
+import os
+import shutil
+import tempfile
+import unittest
+
+from reactions.cache import CombinationStore, MemoryCache
+from reactions.combinations import CalculateCombinations, Partitions, partitions3
+
+
+class Value:
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+class MemoryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MemoryCache(max_bytes=100)
+
+    def test_hits_and_misses(self):
+        value = Value(10)
+        self.assertIsNone(self.cache.get((8, 4)))
+        self.cache.put((8, 4), value)
+        self.assertIs(value, self.cache.get((8, 4)))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_least_recently_used_evicted(self):
+        self.cache.put((1, 1), Value(40))
+        self.cache.put((2, 1), Value(40))
+        self.cache.get((1, 1))
+        self.cache.put((3, 1), Value(40))
+        self.assertIn((1, 1), self.cache)
+        self.assertNotIn((2, 1), self.cache)
+        self.assertEqual(80, self.cache.nbytes)
+
+    def test_oversized_value_skipped(self):
+        self.cache.put((1, 1), Value(40))
+        self.cache.put((2, 1), Value(200))
+        self.assertIn((1, 1), self.cache)
+        self.assertNotIn((2, 1), self.cache)
+        self.assertEqual(40, self.cache.nbytes)
+
+
+class PartitionsTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        expected = list(partitions3((12, 6)))
+        partitions = Partitions.load(expected)
+        self.assertEqual(len(expected), len(partitions))
+        self.assertEqual(expected, list(partitions))
+        self.assertEqual(expected, list(partitions))
+
+    def test_immutable(self):
+        partitions = Partitions.load(partitions3((4, 2)))
+        with self.assertRaises(ValueError):
+            partitions.numbers[0, 0] = 1
+
+    def test_empty(self):
+        partitions = Partitions.load([])
+        self.assertEqual(0, len(partitions))
+        self.assertEqual([], list(partitions))
+        self.assertEqual([], list(Partitions.decode(partitions.encode())))
+
+    def test_encode_and_decode(self):
+        expected = list(partitions3((12, 6)))
+        value = Partitions.load(expected).encode()
+        partitions = Partitions.decode(value)
+        self.assertEqual(expected, list(partitions))
+        self.assertEqual(partitions.offsets.tolist(), Partitions.load(expected).offsets.tolist())
+
+    def test_encoded_size(self):
+        partitions = Partitions.load(partitions3((40, 20)))
+        self.assertLess(len(partitions.encode()), partitions.nbytes // 10)
+
+    def test_decode_other_version(self):
+        value = bytearray(Partitions.load(partitions3((4, 2))).encode())
+        value[6] += 1
+        self.assertIsNone(Partitions.decode(bytes(value)))
+        self.assertIsNone(Partitions.decode(b'\x80\x04'))
+
+    def test_decode_truncated(self):
+        value = Partitions.load(partitions3((12, 6))).encode()
+        for size in [Partitions.header.size, Partitions.header.size + 3, len(value) - 1]:
+            self.assertIsNone(Partitions.decode(value[:size]))
+        header = value[:Partitions.header.size]
+        other = Partitions.load(partitions3((4, 2))).encode()
+        self.assertIsNone(Partitions.decode(header + other[Partitions.header.size:]))
+
+
+class CombinationStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store = CombinationStore(os.path.join(self.tmpdir, 'cache.sqlite3'), max_bytes=100)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_and_put(self):
+        self.assertIsNone(self.store.get((8, 4)))
+        self.store.put((8, 4), b'abc')
+        self.assertEqual(b'abc', self.store.get((8, 4)))
+        self.store.put((8, 4), b'def')
+        self.assertEqual(b'def', self.store.get((8, 4)))
+        self.assertEqual(1, len(self.store))
+        self.assertEqual(3, self.store.size)
+
+    def test_least_recently_used_evicted(self):
+        self.store.put((1, 1), b'x' * 40)
+        self.store.put((2, 1), b'x' * 40)
+        self.store.get((1, 1))
+        self.store.put((3, 1), b'x' * 40)
+        self.assertIn((1, 1), self.store)
+        self.assertNotIn((2, 1), self.store)
+        self.assertIn((3, 1), self.store)
+        self.assertLessEqual(self.store.size, 100)
+
+    def test_oversized_value_kept(self):
+        self.store.put((1, 1), b'x' * 40)
+        self.store.put((2, 1), b'x' * 200)
+        self.assertNotIn((1, 1), self.store)
+        self.assertEqual(b'x' * 200, self.store.get((2, 1)))
+
+    def test_shared_between_connections(self):
+        self.store.put((4, 2), b'alpha')
+        other = CombinationStore(self.store.path)
+        self.assertEqual(b'alpha', other.get((4, 2)))
+        other.close()
+
+
+class CalculateCombinationsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.store, self.memory = CalculateCombinations.store, CalculateCombinations.memory
+        CalculateCombinations.store = CombinationStore(os.path.join(self.tmpdir, 'cache.sqlite3'))
+        CalculateCombinations.memory = MemoryCache()
+
+    def tearDown(self):
+        CalculateCombinations.store.close()
+        CalculateCombinations.store, CalculateCombinations.memory = self.store, self.memory
+        shutil.rmtree(self.tmpdir)
+
+    def test_results_cached(self):
+        expected = list(partitions3((12, 6)))
+        self.assertNotIn((12, 6), CalculateCombinations.store)
+        self.assertEqual(expected, list(CalculateCombinations((12, 6))))
+        self.assertIn((12, 6), CalculateCombinations.store)
+        self.assertEqual(expected, list(CalculateCombinations((12, 6))))
+        self.assertEqual(1, CalculateCombinations.memory.hits)
+
+    def test_results_read_from_store(self):
+        expected = list(CalculateCombinations((12, 6)))
+        CalculateCombinations.memory.clear()
+        self.assertEqual(expected, list(CalculateCombinations((12, 6))))
+        self.assertEqual((0, 1), (CalculateCombinations.memory.hits,
+                                  CalculateCombinations.memory.misses))
+        self.assertIn((12, 6), CalculateCombinations.memory)
+
+    def test_stale_entry_replaced(self):
+        CalculateCombinations.store.put((12, 6), b'\x80\x04stale')
+        expected = list(partitions3((12, 6)))
+        self.assertEqual(expected, list(CalculateCombinations((12, 6))))
+        value = CalculateCombinations.store.get((12, 6))
+        self.assertEqual(expected, list(Partitions.decode(value)))
+
+    def test_truncated_entry_replaced(self):
+        value = Partitions.load(partitions3((12, 6))).encode()
+        CalculateCombinations.store.put((12, 6), value[:-10])
+        self.assertEqual(list(partitions3((12, 6))), list(CalculateCombinations((12, 6))))
+        self.assertEqual(value, CalculateCombinations.store.get((12, 6)))
@@ -1,6 +1,7 @@
 # pylint: disable=missing-docstring, invalid-name, too-many-public-methods
 # pylint: disable=no-self-use
 import unittest
+from unittest import mock
 import math
 
 import numpy as np
@@ -9,7 +10,13 @@ from reactions.units import Energy, Distance
 from reactions.nubase import Nuclides
 from reactions.system import System
 from reactions.combinations import Reaction
-from reactions.calculations import CoulombBarrier
+from reactions.calculations import (
+    CoulombBarrier,
+    GamowKernel,
+    GamowSweep,
+    HyperphysicsDecayScenario,
+    r0_column,
+)
 
 
 nuclides = Nuclides.data()
@@ -129,6 +136,65 @@ class GeigerNuttalLawTest(unittest.TestCase):
         self.assertEqual(-6, int(c.value()))
 
 
+class GamowKernelTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pairs = [
+            ('185Re', '4He', '181Ta'),
+            ('58Fe', '4He', '54Cr'),
+            ('190Pt', '4He', '186Os'),
+            ('8Be', '4He', '4He'),
+            ('106Pd', '46Ca', '60Fe'),
+            ('212Po', '4He', '208Pb'),
+        ]
+        cls.reactions = [Reaction.load(
+            reactants=[(1, (parent, '0'))],
+            daughters=[(1, (smaller, '0')), (1, (larger, '0'))],
+        ) for parent, smaller, larger in pairs]
+        cls.kernel = GamowKernel.load(
+            [r.components for r in cls.reactions],
+            [r.q_value for r in cls.reactions],
+        )
+
+    def test_gamow(self):
+        expected = [r.gamow().value() for r in self.reactions]
+        np.testing.assert_allclose(expected, self.kernel.gamow(), rtol=1e-12)
+        self.assertTrue(math.isnan(self.kernel.gamow()[1]))
+
+    def test_gamow2(self):
+        values = self.kernel.gamow2()
+        for i in [0, 2, 3, 5]:
+            np.testing.assert_approx_equal(self.reactions[i].gamow2().value(), values[i])
+        self.assertTrue(math.isnan(values[1]))
+
+    def test_geiger_nuttal(self):
+        values = self.kernel.geiger_nuttal()
+        for i in [0, 2, 3, 5]:
+            np.testing.assert_approx_equal(self.reactions[i].geiger_nuttal().value(), values[i])
+        self.assertTrue(math.isnan(values[1]))
+
+    def test_screening(self):
+        screenings = np.array([0, 10, 20, 0, 5, 30])
+        kernel = GamowKernel(
+            [(4, 2)] * 6, [(181, 73)] * 6, [self.reactions[0].q_value.mev] * 6,
+            screening=screenings,
+        )
+        expected = [self.reactions[0].gamow(screening=s).value() for s in screenings]
+        np.testing.assert_allclose(expected, kernel.gamow(), rtol=1e-12)
+
+    def test_load_gamow_values(self):
+        s = System.load('106Pd', model='induced-fission', gamow=True, lower_bound=-10000)
+        reactions = [r for _, r in s.reactions()]
+        self.assertTrue(reactions)
+        for r in reactions:
+            gamow = r.gamow()
+            expected = gamow.value() if gamow else -1
+            if math.isnan(expected):
+                self.assertTrue(math.isnan(r.gamow_value))
+            else:
+                self.assertAlmostEqual(expected, r.gamow_value, delta=abs(expected) * 1e-12)
+
+
 class DecayTest(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -230,6 +296,167 @@ class AlphaDecayTest(unittest.TestCase):
         np.testing.assert_approx_equal(0.0, pt190.power(seconds=1e20).watts)
 
 
+    def test_screening_sweep(self):
+        screenings = [0, 5.5, 11, 20]
+        system = System.load('Pt', model='induced-decay')
+        for scenario in (system.hyperphysics(seconds=1, moles=1),
+                         system.hermes(seconds=1, moles=1)):
+            df = scenario.sweep(screenings)
+            self.assertEqual(len(screenings) * len(scenario.df), len(df))
+            for value in screenings:
+                expected = scenario.recalculate(screening=value).df
+                actual = df[df.screening == value]
+                np.testing.assert_allclose(expected.gamow_factor, actual.gamow_factor)
+                np.testing.assert_allclose(expected.watts, actual.watts)
+
+    def test_r0(self):
+        r0s = (1.1, 1.2, 1.57)
+        system = System.load('Pt', model='induced-decay')
+        scenario = system.hermes(seconds=1, moles=1, r0=list(r0s))
+        self.assertEqual(r0s, scenario.r0s)
+        self.assertNotIn('gamow_factor', scenario.df)
+        activity = scenario.activity()
+        for i, r0 in enumerate(r0s):
+            expected = system.hermes(seconds=1, moles=1, r0=r0)
+            np.testing.assert_allclose(
+                expected.df.gamow_factor, scenario.df[r0_column('gamow_factor', r0)])
+            np.testing.assert_allclose(expected.df.watts, scenario.df[r0_column('watts', r0)])
+            np.testing.assert_approx_equal(expected.activity(), activity[i])
+        np.testing.assert_allclose(
+            system.hermes(seconds=1, moles=1).df.watts, scenario.df[r0_column('watts', 1.2)])
+        recalculated = system.hermes(seconds=1, moles=1, r0=np.array(r0s))
+        np.testing.assert_allclose(activity, recalculated.activity(r0=list(r0s)))
+        self.assertEqual(2, len(recalculated.activity(r0=[1.1, 1.3])))
+
+    def test_incremental_recalculation(self):
+        scenario = System.load('Pt', model='induced-decay').hyperphysics(seconds=1, moles=1)
+        stages = {}
+        for name, _ in scenario.stages:
+            stages[name] = mock.patch.object(
+                HyperphysicsDecayScenario, name, autospec=True,
+                side_effect=getattr(HyperphysicsDecayScenario, name)).start()
+        self.addCleanup(mock.patch.stopall)
+
+        activity = scenario.activity(seconds=1e20)
+        power = scenario.power(seconds=1e20)
+        self.assertEqual(1, stages['calculate_products'].call_count)
+        self.assertEqual(0, stages['calculate_preliminaries'].call_count)
+        self.assertEqual(0, stages['calculate_gamow_factor'].call_count)
+
+        scenario.activity(screening=11, seconds=1e20)
+        self.assertEqual(1, stages['calculate_gamow_factor'].call_count)
+        self.assertEqual(2, stages['calculate_products'].call_count)
+        scenario.activity(screening=11, seconds=1e20)
+        self.assertEqual(2, stages['calculate_products'].call_count)
+        mock.patch.stopall()
+
+        fresh = System.load('Pt', model='induced-decay').hyperphysics(seconds=1e20, moles=1)
+        np.testing.assert_approx_equal(fresh.activity(), activity)
+        np.testing.assert_approx_equal(fresh.power().watts, power.watts)
+        self.assertIs(scenario.recalculate(seconds=5).df, scenario.recalculate(seconds=5).df)
+
+    def test_timeseries(self):
+        scenario = System.load('Pt', model='induced-decay').hyperphysics(
+            seconds=1, moles=1, screening=11)
+        times = np.geomspace(1, 1e20, 5)
+        df = scenario.timeseries(times)
+        self.assertEqual(5 * 6, len(df))
+        self.assertEqual(['190Pt', '192Pt'], df.parent[:2].tolist())
+        totals = df.groupby('seconds').sum(numeric_only=True)
+        for seconds, row in totals.iterrows():
+            np.testing.assert_approx_equal(scenario.activity(seconds=seconds), row.partial_activity)
+            np.testing.assert_approx_equal(scenario.power(seconds=seconds).watts, row.watts)
+            np.testing.assert_approx_equal(
+                scenario.remaining_active_atoms(seconds=seconds), row.remaining_active_atoms)
+
+        scenario = System.load('Pt', model='induced-decay').hyperphysics(
+            seconds=1, moles=1, r0=[1.1, 1.2])
+        df = scenario.timeseries([1e20])
+        for r0, watts in zip(scenario.r0s, scenario.power(seconds=1e20).watts):
+            np.testing.assert_approx_equal(df[r0_column('watts', r0)].sum(), watts)
+
+    def test_timeseries_several_decays(self):
+        scenario = System.load('106Pd', model='induced-fission').hyperphysics(seconds=1, moles=1)
+        self.assertGreater(len(scenario.df), scenario.df.parent.nunique())
+        for seconds in [1e-40, 1]:
+            df = scenario.timeseries([seconds])
+            self.assertEqual(scenario.df.parent.nunique(), len(df))
+            np.testing.assert_approx_equal(
+                scenario.remaining_active_atoms(seconds=seconds), df.remaining_active_atoms.sum())
+            np.testing.assert_approx_equal(
+                scenario.activity(seconds=seconds), df.partial_activity.sum())
+
+    def test_timeseries_empty(self):
+        scenario = System.load('Ni', model='induced-fission').hyperphysics(seconds=1, moles=1)
+        df = scenario.timeseries([1, 10])
+        self.assertTrue(df.empty)
+        self.assertEqual(['seconds', 'parent', 'remaining_active_atoms', 'partial_activity',
+                          'watts'], df.columns.tolist())
+
+
+class GamowSweepTest(unittest.TestCase):
+    def test_sweep(self):
+        screenings = [0, 2.5, 10, 30]
+        sweep = System.load('Pt', model='induced-decay').gamow_sweep(screenings)
+        self.assertEqual((len(sweep.reactions), len(screenings)), sweep.values.shape)
+        self.assertEqual(len(sweep.reactions) * len(screenings), len(sweep.df))
+        for i, value in enumerate(screenings):
+            expected = [r.gamow(screening=value).value() for r in sweep.reactions]
+            np.testing.assert_allclose(expected, sweep.values[:, i], rtol=1e-12)
+            rows = sweep.df[sweep.df.screening == value]
+            np.testing.assert_allclose(expected, rows.gamow_factor, rtol=1e-12)
+        self.assertEqual('190Pt + e-', sweep.df.parents[0])
+
+    def test_single_reaction(self):
+        factor = Reaction.load(
+            reactants=[(1, ('190Pt', '0'))],
+            daughters=[(1, ('4He', '0')), (1, ('186Os', '0'))],
+        ).gamow()
+        values = factor.sweep([0, 11])
+        np.testing.assert_approx_equal(39.086112497598315, values[0])
+        factor.kwargs['screening'] = 11
+        np.testing.assert_approx_equal(factor.value(), values[1])
+
+    def test_r0(self):
+        r0s = [1.1, 1.25]
+        sweep = System.load('Pt', model='induced-decay').gamow_sweep([0, 10], r0=r0s)
+        self.assertEqual((len(sweep.reactions), 2, 2), sweep.values.shape)
+        for r0 in r0s:
+            for value in [0, 10]:
+                expected = [r.gamow(screening=value, r0=r0).value() for r in sweep.reactions]
+                rows = sweep.df[sweep.df.screening == value]
+                np.testing.assert_allclose(
+                    expected, rows[r0_column('gamow_factor', r0)], rtol=1e-12)
+
+    def test_r0_array(self):
+        factor = Reaction.load(
+            reactants=[(1, ('190Pt', '0'))],
+            daughters=[(1, ('4He', '0')), (1, ('186Os', '0'))],
+        ).gamow(r0=[1.1, 1.2])
+        values = factor.value()
+        self.assertEqual(2, len(values))
+        np.testing.assert_approx_equal(39.086112497598315, values[1])
+        factor.kwargs['r0'] = 1.1
+        np.testing.assert_approx_equal(factor.value(), values[0])
+
+    def test_system_r0(self):
+        system = System.load('106Pd', model='induced-fission', r0=[1.1, 1.2, 1.57])
+        with self.assertRaises(ValueError):
+            list(system.reactions())
+        reactions = list(System.load('106Pd', model='induced-fission', r0=1.1).reactions())
+        self.assertTrue(reactions)
+        self.assertTrue(all(np.ndim(r.gamow_value) == 0 for _, r in reactions))
+        # The reactions themselves do not depend on r0.
+        system = System.load('Pt', model='induced-decay', r0=[1.1, 1.2])
+        self.assertEqual(len(list(System.load('Pt', model='induced-decay').reactions())),
+                         len(list(system.reactions())))
+
+    def test_skips_reactions_without_components(self):
+        reactions = [r for _, r in System.load('p+d', lower_bound=-3000).reactions()]
+        sweep = GamowSweep(reactions, [0, 1])
+        self.assertEqual(len([r for r in reactions if r.gamow() is not None]),
+                         len(sweep.reactions))
+
 
 # Model production of of 22,522,522,523 4He/s from 0.02193926719 mol pt
 # over a period of 4440 seconds
@@ -1,13 +1,18 @@
 # pylint: disable=missing-docstring, invalid-name
 import unittest
 
-from reactions.nubase import parse_spec
+from reactions.nubase import Nuclides, parse_spec
 from reactions.system import System
 from reactions.combinations import (
+    DaughterFamilies,
+    DaughterFamily,
     ElectronMediatedDecayModel,
+    FilterPlan,
+    GAMMA_PHOTON,
     PionExchangeAndDecayModel,
     Reaction,
     calculate_combinations,
+    partitions3,
     StandardModel,
     StrictPionExchangeModel,
     vectors3,
@@ -15,6 +20,33 @@ from reactions.combinations import (
 
 
 class ReactionsTest(unittest.TestCase):
+    def test_slots(self):
+        r = Reaction.load(
+            reactants=[(1, ('p', '0')), (1, ('7Li', '0'))],
+            daughters=[(2, ('4He', '0'))],
+        )
+        self.assertFalse(hasattr(r, '__dict__'))
+
+    def test_shared_photon(self):
+        r0, r1 = (Reaction.load(
+            reactants=[(1, ('p', '0')), (1, ('7Li', '0'))],
+            daughters=[(1, ('8Be', '0'))],
+        ) for _ in range(2))
+        self.assertIs(GAMMA_PHOTON, r0.rvalues[-1][1])
+        self.assertIs(r0.rvalues[-1][1], r1.rvalues[-1][1])
+        self.assertEqual(1, r0.daughter_count)
+        self.assertFalse(r0.is_stable)
+        self.assertEqual(17254, int(r0.q_value.kev))
+
+    def test_deferred_values(self):
+        r = Reaction.load(
+            reactants=[(1, ('p', '0')), (1, ('7Li', '0'))],
+            daughters=[(1, ('4He', '0')), (1, ('4He', '0'))],
+        )
+        self.assertIs(r.notes, r.notes)
+        self.assertIs(r.q_value, r.q_value)
+        self.assertEqual(r.gamow_value, r.gamow_value)
+
     def test_daughter_count(self):
         r = Reaction.load(
             reactants=[(1, ('p', '0')), (1, ('7Li', '0'))],
@@ -109,12 +141,110 @@ class PossibleDaughtersTest(unittest.TestCase):
             ((1, 0), (1, 1)),
         ], list(it))
 
+    def test_partitions3(self):
+        def crossed(totals):
+            results = []
+            for masses in vectors3(totals[0]):
+                for protons in vectors3(totals[1]):
+                    pairs = list(zip(masses, protons))
+                    if any(m < p for m, p in pairs):
+                        continue
+                    daughters = tuple(sorted(p for p in pairs if p != (0, 0)))
+                    if daughters not in results:
+                        results.append(daughters)
+            return results
+
+        for mass_number in range(-1, 16):
+            for atomic_number in range(-1, mass_number + 2):
+                totals = (mass_number, atomic_number)
+                self.assertEqual(crossed(totals), list(partitions3(totals)), totals)
+
     def test_possible_daughters(self):
         ts = list(calculate_combinations((6, 3)))
         self.assertEqual(19, len(ts))
         self.assertTrue(all(sum(m for m, a in t) == 6 for t in ts))
         self.assertTrue(all(sum(a for m, a in t) == 3 for t in ts))
 
+    def _reactions(self, spec, **kwargs):
+        system = System.load(spec, excited=True, **kwargs)
+        return [(r.q_value.kev, [d.full_label for _, d in r.rvalues])
+                for c in system.combinations for r in c.reactions()]
+
+    def test_q_window(self):
+        unbounded = self._reactions('p+7Li', lower_bound=-1e9, upper_bound=1e9)
+        expected = [r for r in unbounded if -5000 < r[0] <= 628]
+        self.assertTrue(expected)
+        self.assertLess(len(expected), len(unbounded))
+        self.assertEqual(expected, self._reactions('p+7Li', lower_bound=-5000, upper_bound=628))
+
+    def test_batches(self):
+        # pylint: disable=protected-access
+        options = [{}, {'excited': True, 'lower_bound': -5000}, {'daughter_count': '2'}]
+        for kwargs in options:
+            for c in System.load('p+7Li, 6Li+12C', **kwargs).combinations:
+                expected = []
+                for daughters in c._reactions():
+                    r = Reaction(c._parents, ((1, d) for d in daughters), **c._kwargs)
+                    if c._allowed(r):
+                        expected.append((r.q_value.kev, [d.full_label for _, d in r.rvalues]))
+                batch_size, DaughterFamily.batch_size = DaughterFamily.batch_size, 5
+                try:
+                    actual = [(r.q_value.kev, [d.full_label for _, d in r.rvalues])
+                              for r in c.reactions()]
+                finally:
+                    DaughterFamily.batch_size = batch_size
+                self.assertTrue(expected)
+                self.assertEqual(expected, actual)
+
+    def test_filter_pushdown(self):
+        options = [
+            {'stable_daughters': True},
+            {'min_half_life': 3600},
+            {'stable_daughters': True, 'daughter_count': '2'},
+        ]
+        unfiltered = [r for c in System.load('p+7Li, 6Li+12C', lower_bound=-5000).combinations
+                      for r in c.reactions()]
+        for kwargs in options:
+            plan = FilterPlan(**kwargs)
+            expected = [(r.q_value.kev, [d.full_label for _, d in r.rvalues])
+                        for r in unfiltered
+                        if plan.allows_count(r.daughter_count) and all(
+                            plan.allows_daughter(d) for _, d in r.rvalues if d is not GAMMA_PHOTON)]
+            system = System.load('p+7Li, 6Li+12C', lower_bound=-5000, **kwargs)
+            actual = [(r.q_value.kev, [d.full_label for _, d in r.rvalues])
+                      for c in system.combinations for r in c.reactions()]
+            self.assertTrue(expected)
+            self.assertLess(len(expected), len(unfiltered))
+            self.assertEqual(expected, actual)
+
+    def test_filter_plan(self):
+        plan = FilterPlan(daughter_count='2,3', stable_daughters=True)
+        self.assertTrue(plan.allows_count(3))
+        self.assertFalse(plan.allows_count(4))
+        self.assertEqual([False, True, True, False], plan.allows_counts([1, 2, 3, 4]).tolist())
+        isomers = plan.isomers()
+        self.assertEqual(['6Li'], [n.full_label for n in isomers[(6, 3)]])
+        self.assertEqual((), isomers[(8, 4)])
+        self.assertIsNone(FilterPlan(excited=True).members(Nuclides.data()))
+
+
+class DaughterFamiliesTest(unittest.TestCase):
+    def test_shared_families(self):
+        s = System.load('H+Li', lower_bound=-5000)
+        keys = [c.family_key() for c in s.combinations]
+        self.assertLess(len(set(keys)), len(keys))
+        families = DaughterFamilies(s.combinations)
+        for c in s.combinations:
+            expected = [(r.q_value.kev, [n.full_label for _, n in r.lvalues + r.rvalues])
+                        for r in c.reactions()]
+            actual = [(r.q_value.kev, [n.full_label for _, n in r.lvalues + r.rvalues])
+                      for r in families.reactions(c)]
+            self.assertEqual(expected, actual)
+
+    def test_no_family(self):
+        s = System.load('58Ni', model='separated-nuclide')
+        self.assertEqual([None], [c.family_key() for c in s.combinations])
+
 
 class PionExchangeAndSimultaneousDecayTest(unittest.TestCase):
     @classmethod
@@ -1,13 +1,26 @@
 # pylint: disable=missing-docstring, too-many-public-methods, invalid-name
+import os
+import shutil
+import tempfile
 import unittest
 
-from reactions.nubase import NUBASE_PATH, Nuclide, Nuclides
+import numpy as np
+
+from reactions.nubase import (
+    EDITIONS,
+    NUBASE_PATH,
+    NubaseSnapshot,
+    Nuclide,
+    NuclideTable,
+    Nuclides,
+    parse_spec,
+)
 
 
 class NuclideTest(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
-        with open(NUBASE_PATH) as fh:
+        with open(NUBASE_PATH, encoding='utf-8') as fh:
             cls.lines = list(fh)
 
     def test_basic_fields(self):
@@ -166,9 +179,192 @@ class NuclidesTest(unittest.TestCase):
         ns = self.nuclides.isomers[n.numbers]
         self.assertEqual([('7Li', '0'), ('7Li', 'i')], [n.signature for n in ns])
 
+    def test_ids(self):
+        n = self.nuclides.get(('7Li', '0'))
+        self.assertIs(n, list(self.nuclides)[n.index])
+        self.assertEqual(n.mass_excess_kev, self.nuclides.mass_excess_kev[n.index])
+
+    def test_fancy_indexing(self):
+        ids = [self.nuclides.get(s).index for s in [('p', '0'), ('7Li', '0'), ('4He', '0')]]
+        kev = self.nuclides.mass_excess_kev[ids]
+        q_value = kev[0] + kev[1] - 2 * kev[2]
+        self.assertAlmostEqual(17346.2443, q_value)
+
+    def test_isomer_grid(self):
+        isomers = self.nuclides.isomers
+        self.assertIn((7, 3), isomers)
+        self.assertNotIn((7, 8), isomers)
+        self.assertNotIn((-3, -1), isomers)
+        start, stop = isomers.range((7, 3))
+        self.assertEqual(2, stop - start)
+        self.assertEqual(['7Li', '7Li'],
+                         [list(self.nuclides)[i].label for i in isomers.ids[start:stop]])
+
+    def test_grid_cells(self):
+        isomers = self.nuclides.isomers
+        cells = isomers.cells([(7, 3), (0, -1), (7, 300), (-1, 0)])
+        self.assertEqual(2, isomers.stop.ravel()[cells[0]] - isomers.start.ravel()[cells[0]])
+        self.assertTrue(isomers.present.ravel()[cells[1]])
+        self.assertEqual([-1, -1], cells[2:].tolist())
+
+    def test_mass_excess_range(self):
+        isomers = self.nuclides.isomers
+        kevs = [n.mass_excess_kev for n in isomers[(7, 3)]]
+        self.assertEqual((min(kevs), max(kevs)), isomers.mass_excess_range((7, 3)))
+        self.assertLess(*isomers.mass_excess_range((7, 3)))
+        self.assertEqual((0, 0), isomers.mass_excess_range((0, -1)))
+        self.assertIsNone(isomers.mass_excess_range((7, 8)))
+        self.assertIsNone(isomers.mass_excess_range((500, 1)))
+
+    def test_leptons(self):
+        self.assertEqual('e-', self.nuclides.isomers[(0, -1)][0].label)
+        self.assertEqual('ν', self.nuclides.isomers[(0, 0)][0].label)
+        self.assertEqual((), self.nuclides.isomers[(-3, -1)])
+        self.assertEqual((), self.nuclides.isomers[(500, 1)])
+
     def test_trace_isotopes(self):
         n0 = self.nuclides.get(('90Sr', '0'))
         self.assertFalse(n0.is_stable)
         self.assertTrue(n0.in_nature)
         self.assertTrue(n0.is_trace)
         self.assertIn('trace', n0.notes)
+
+
+class ParseSpecTest(unittest.TestCase):
+
+    def _labels(self, spec):
+        return [tuple(n.label for _, n in r) for r in parse_spec(spec)]
+
+    def test_distinct_operands(self):
+        self.assertEqual([('p', '6Li'), ('p', '7Li')], self._labels('p+Li'))
+
+    def test_identical_operands(self):
+        self.assertEqual([('6Li', '6Li'), ('6Li', '7Li'), ('7Li', '7Li')],
+                         self._labels('Li+Li'))
+
+    def test_overlapping_operands(self):
+        self.assertEqual([('6Li', '6Li', '7Li'), ('6Li', '7Li', '7Li'), ('7Li', '7Li', '7Li')],
+                         self._labels('Li+Li+7Li'))
+
+    def test_all_plus_all(self):
+        singles = len(list(parse_spec('all')))
+        pairs = self._labels('all+all')
+        self.assertEqual(singles * (singles + 1) // 2, len(pairs))
+        self.assertEqual(len(pairs), len({tuple(sorted(p)) for p in pairs}))
+
+
+class NuclideTableTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with open(NUBASE_PATH, encoding='utf-8') as fh:
+            cls.table = NuclideTable.parse(fh)
+
+    def test_columns(self):
+        self.assertEqual(5476, len(self.table))
+        self.assertEqual((7, 3), (self.table.mass_number[21], self.table.atomic_number[21]))
+        self.assertEqual('7Li', self.table.label[21])
+
+    def test_flags(self):
+        self.assertTrue(self.table.is_stable[21])
+        self.assertTrue(self.table.is_excited[22])
+
+    def test_half_life_seconds(self):
+        self.assertEqual(613.9, self.table.half_life_seconds[0])
+        self.assertEqual(float('inf'), self.table.half_life_seconds[1])
+
+    def test_decay_modes(self):
+        self.assertTrue(self.table.decays_by('B-d')[14])
+        self.assertTrue(self.table.decays_by('B-')[14])
+        self.assertFalse(self.table.decays_by('A')[14])
+
+    def test_branching_ratios(self):
+        self.assertEqual(100, self.table.branching_ratio('B-')[14])
+        np.testing.assert_approx_equal(0.000165, self.table.branching_ratio('B-d')[14])
+        self.assertTrue(np.isnan(self.table.branching_ratio('A')[14]))
+
+    def test_view(self):
+        n = self.table[21]
+        self.assertEqual(('7Li', '0'), n.signature)
+        self.assertFalse(hasattr(n, '__dict__'))
+
+
+class NubaseEditionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        edition = EDITIONS['2020']
+
+        def line(**fields):
+            chars = [' '] * 140
+            for field, start, _ in edition.columns:
+                value = fields.get(field, '')
+                chars[start:start + len(value)] = value
+            return ''.join(chars).rstrip() + '\n'
+
+        cls.lines = [
+            '# Nubase2020 header\n',
+            line(massNumber='006', atomicNumber='003', atomicNumberExtra='0',
+                 nuclide='6Li', massExcess='14086.8821', halfLife='stbl',
+                 spinAndParity='1+', decayModesAndIntensities='IS=7.59 4'),
+            line(massNumber='006', atomicNumber='003', atomicNumberExtra='1',
+                 nuclide='6Li', isomer='i', massExcess='17649.76', halfLife='56',
+                 halfLifeUnit='as', decayModesAndIntensities='IT=100'),
+            line(massNumber='007', atomicNumber='003', atomicNumberExtra='0',
+                 nuclide='7Li', massExcess='14907.1#', halfLife='stbl',
+                 decayModesAndIntensities='IS=92.41 4'),
+        ]
+        cls.table = NuclideTable.parse(cls.lines, edition)
+
+    def test_comments_skipped(self):
+        self.assertEqual(3, len(self.table))
+
+    def test_labels(self):
+        self.assertEqual([('6Li', '0'), ('6Li', 'i'), ('7Li', '0')],
+                         [self.table[i].signature for i in range(3)])
+
+    def test_values(self):
+        self.assertEqual([14086.8821, 17649.76, 14907.1], self.table.mass_excess_kev.tolist())
+        self.assertEqual(56e-18, self.table.half_life_seconds[1])
+        self.assertEqual({'→IT'}, self.table[1].notes)
+
+    def test_row(self):
+        self.assertEqual('IT=100', self.table[1].row['decayModesAndIntensities'])
+
+    def test_2012_layout(self):
+        table = NuclideTable.parse(['001 0000   1 n      8071.3171   0.0005 \n'],
+                                   EDITIONS['2012'])
+        self.assertEqual(('n', '0'), table[0].signature)
+
+
+class NubaseSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.path = os.path.join(self.dirname, 'nubtab.asc')
+        with open(NUBASE_PATH, encoding='utf-8') as fh:
+            self.lines = [next(fh) for _ in range(20)]
+        with open(self.path, 'w', encoding='utf-8') as fh:
+            fh.writelines(self.lines[:10])
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_snapshot_written(self):
+        Nuclides.load(path=self.path)
+        self.assertTrue(os.path.exists(self.path + '.snapshot'))
+        self.assertIsNotNone(NubaseSnapshot(self.path).read())
+
+    def test_snapshot_matches_source(self):
+        parsed = list(Nuclides.load(path=self.path))
+        restored = list(Nuclides.load(path=self.path))
+        self.assertEqual(
+            [(n.signature, n.mass_excess_kev, n.notes) for n in parsed],
+            [(n.signature, n.mass_excess_kev, n.notes) for n in restored],
+        )
+
+    def test_snapshot_rebuilt(self):
+        Nuclides.load(path=self.path)
+        with open(self.path, 'w', encoding='utf-8') as fh:
+            fh.writelines(self.lines)
+        self.assertIsNone(NubaseSnapshot(self.path).read())
+        nuclides = Nuclides.load(path=self.path)
+        self.assertIn(('6Li', '0'), [n.signature for n in nuclides])
+        self.assertIsNotNone(NubaseSnapshot(self.path).read())
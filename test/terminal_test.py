@@ -1,8 +1,14 @@
 # pylint: disable=missing-docstring, invalid-name
+import csv
+import io
+import json
 import unittest
 
+import numpy as np
+
+from reactions.nubase import Nuclides, decode_reactions, encode_daughter_ids, encode_reactions
 from reactions.system import System
-from reactions.terminal import TerminalView, Options
+from reactions.terminal import ExternalSort, TerminalView, Options
 
 
 class SystemTest(unittest.TestCase):
@@ -20,6 +26,111 @@ class SystemTest(unittest.TestCase):
         s = System.load('H+Li')
         self.assertEqual(6, len(s.combinations))
 
+    def test_limit(self):
+        s = System.load('H+Li', lower_bound=-5000)
+        lines = TerminalView(s).lines(Options())
+        self.assertGreater(len(lines), 5)
+        self.assertEqual(lines[:5], TerminalView(s).lines(Options(limit=5)))
+
+    def test_max_memory(self):
+        s = System.load('H+Li', lower_bound=-5000)
+        lines = TerminalView(s).lines(Options())
+        fan_in, ExternalSort.fan_in = ExternalSort.fan_in, 3
+        try:
+            self.assertEqual(lines, TerminalView(s).lines(Options(max_memory=1000)))
+        finally:
+            ExternalSort.fan_in = fan_in
+
+    def test_limit_nan_gamow(self):
+        # Some of these reactions have a Q-value that is not positive, and
+        # so a NaN Gamow factor.
+        s = System.load('58Ni', model='induced-fission', lower_bound=-30000)
+        lines = TerminalView(s).lines(Options())
+        self.assertGreater(len(lines), 5)
+        self.assertEqual(lines[:5], TerminalView(s).lines(Options(limit=5)))
+
+    def test_max_memory_nan_gamow(self):
+        s = System.load('58Ni', model='induced-fission', lower_bound=-30000)
+        lines = TerminalView(s).lines(Options())
+        self.assertEqual(lines, TerminalView(s).lines(Options(max_memory=2048)))
+
+    def _summary(self, reactions):
+        return [(c, r.q_value.kev, [n.full_label for _, n in r.lvalues],
+                 [n.full_label for _, n in r.rvalues]) for c, r in reactions]
+
+    def test_parallel_reactions(self):
+        s = System.load('H+Li, p+C', lower_bound=-1000)
+        serial = self._summary(s.reactions())
+        self.assertTrue(serial)
+        self.assertEqual(serial, self._summary(s.reactions(jobs=3)))
+
+    def test_parallel_gamow(self):
+        s = System.load('106Pd, 108Pd', model='induced-fission', lower_bound=-10000)
+        serial = [(r.q_value.kev, r.gamow_value) for _, r in s.reactions()]
+        self.assertTrue(serial)
+        parallel = [(r.q_value.kev, r.gamow_value) for _, r in s.reactions(jobs=2)]
+        np.testing.assert_array_equal(serial, parallel)
+
+    def test_encode_daughter_ids(self):
+        nuclides = Nuclides.data()
+        combination = System.load('106Pd', model='induced-fission').combinations[0]
+        self.assertTrue(combination.from_daughter_ids)
+        parents = combination.parents()
+        encoded = np.concatenate([encode_daughter_ids(parents, ids, nuclides)
+                                  for ids in combination.daughter_ids(parents)])
+        np.testing.assert_array_equal(
+            encode_reactions(combination.reactions(), nuclides), encoded)
+
+    def test_encode_reactions(self):
+        nuclides = Nuclides.data()
+        s = System.load('7Li', model='induced-decay', lower_bound=-20000)
+        reactions = [r for _, r in s.reactions()]
+        decoded = list(decode_reactions(encode_reactions(reactions, nuclides), nuclides))
+        self.assertEqual(len(reactions), len(decoded))
+        for reaction, (lvalues, rvalues) in zip(reactions, decoded):
+            self.assertEqual(reaction.initial_lvalues, lvalues)
+            self.assertEqual(reaction.rvalues, rvalues)
+
+
+class RecordsTest(unittest.TestCase):
+    def test_ndjson(self):
+        s = System.load('p+d', lower_bound=-3000)
+        out = io.StringIO()
+        s.to_records(out, format='ndjson')
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(list(s.reactions())), len(records))
+        self.assertEqual({
+            'parents': ['p', 'd'],
+            'daughters': ['3He', 'ɣ'],
+            'q_value_kev': records[0]['q_value_kev'],
+            'gamow': None,
+            'notes': ['in nature', 'ɣ'],
+            'model': 'standard',
+        }, records[0])
+        self.assertAlmostEqual(5493.477, records[0]['q_value_kev'], places=3)
+        self.assertEqual(['n', 'p', 'p'], records[2]['daughters'])
+
+    def test_ndjson_round_trip(self):
+        def reject(constant):
+            raise ValueError('not valid JSON: {}'.format(constant))
+        s = System.load('58Ni', model='induced-fission', lower_bound=-30000)
+        out = io.StringIO()
+        s.to_records(out, format='ndjson')
+        lines = out.getvalue().splitlines()
+        records = [json.loads(line, parse_constant=reject) for line in lines]
+        self.assertEqual(len(list(s.reactions())), len(records))
+        self.assertIn(None, [r['gamow'] for r in records])
+
+    def test_csv(self):
+        s = System.load('p+d', lower_bound=-3000)
+        out = io.StringIO()
+        s.to_records(out, format='csv')
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(3, len(rows))
+        self.assertEqual('p + d', rows[0]['parents'])
+        self.assertEqual('n + p + p', rows[2]['daughters'])
+        self.assertEqual('standard', rows[2]['model'])
+
 
 class TestAscii(unittest.TestCase):
     @classmethod